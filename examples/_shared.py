@@ -0,0 +1,80 @@
+"""
+Objects shared between the example scripts
+
+Running several examples in one process (e.g. a CI matrix) reuses the same
+frozen value network and environment instead of rebuilding them per script.
+"""
+
+import argparse
+import logging
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Tuple
+
+import torch
+
+from src.core.agent_array import AgentArray, compile_in_place
+from src.core.value_network import ValueNetwork
+from src.environment.power_iot_env import PowerIoTEnvironment
+from src.utils.config_loader import load_config
+
+def setup_example(description: str) -> argparse.Namespace:
+    """Parse the shared example flags, configure logging and the CUDA backends"""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('--verbose', action='store_true', help='Log per-step actions and rewards')
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO, format='%(message)s')
+    
+    # Let cuDNN/cuBLAS pick the fastest kernels for the fixed example shapes
+    torch.backends.cudnn.benchmark = True
+    torch.backends.cuda.matmul.allow_tf32 = True
+    return args
+
+def log_steps(logger: logging.Logger, step_log: List[Tuple[torch.Tensor, Any]],
+              log_step: Callable[[int, List[int], Any], None]):
+    """Log (actions, details) entries recorded during an example's step loop
+    
+    Examples append to step_log instead of logging inside the loop, so the loop never
+    waits on the device; at INFO the actions are never synced to the host at all.
+    """
+    if not logger.isEnabledFor(logging.DEBUG) or not step_log:
+        return
+    actions_cpu = torch.stack([actions for actions, _ in step_log]).tolist()
+    for step, (actions, (_, details)) in enumerate(zip(actions_cpu, step_log), 1):
+        log_step(step, actions, details)
+
+@lru_cache(maxsize=8)
+def get_value_network(state_dim: int, action_dim: int, device: torch.device) -> torch.nn.Module:
+    """Build (once) the shared value network: compiled on CUDA, INT8 + TorchScript on CPU"""
+    value_network = ValueNetwork(state_dim=state_dim, action_dim=action_dim).to(device).eval()
+    if device.type == 'cuda':
+        compile_in_place(value_network)
+        return value_network
+    
+    # INT8 Linear weights cut memory traffic for these small CPU MLPs
+    value_network = torch.quantization.quantize_dynamic(
+        value_network, {torch.nn.Linear}, dtype=torch.qint8
+    )
+    return torch.jit.optimize_for_inference(torch.jit.script(value_network))
+
+@lru_cache(maxsize=8)
+def get_environment(protocols: Tuple[str, ...], config_id: str) -> PowerIoTEnvironment:
+    """Build (once) an environment for the protocols and config file path"""
+    return PowerIoTEnvironment(protocols=list(protocols), config=load_config(config_id))
+
+def build_agent_array(protocol: str, field_config: Dict[str, Any],
+                      shared_value_network: torch.nn.Module, device: torch.device) -> AgentArray:
+    """Build an inference-only agent array: compiled policies on CUDA, INT8 + TorchScript on CPU
+    
+    Either way, fields that share a policy shape run through the stacked-weight batched forward.
+    """
+    if device.type == 'cuda':
+        return AgentArray(protocol_name=protocol, field_config=field_config,
+                          shared_value_network=shared_value_network, device=device,
+                          compile_networks=True)
+    
+    agent_array = AgentArray(protocol_name=protocol, field_config=field_config,
+                             shared_value_network=shared_value_network, device=device,
+                             quantize=True, compile_networks=False)
+    agent_array.optimize_for_inference()
+    return agent_array
@@ -3,14 +3,20 @@
 EtherNet/IP protocol fuzzing example
 """
 
+import numpy as np
+import logging
 import torch
-import yaml
 from pathlib import Path
 
-from src.core.agent_array import AgentArray
-from src.core.value_network import ValueNetwork
-from src.environment.power_iot_env import PowerIoTEnvironment
-from src.fuzzing.mutation_engine import MutationEngine
+from src.fuzzing._factories import get_mutation_engine
+from src.utils.config_loader import load_config
+from src.environment.prefetching_env import PrefetchingEnv
+from examples._shared import get_value_network, get_environment, build_agent_array, setup_example, log_steps
+
+logger = logging.getLogger(__name__)
+
+# EtherNet/IP RegisterSession request, parsed once at import
+_EXAMPLE_REGISTER_SESSION = bytes.fromhex("00650004000000000000000000000000000000000100")
 
 def run_ethernet_ip_example():
     """Run EtherNet/IP example"""
@@ -18,8 +24,7 @@ def run_ethernet_ip_example():
     
     # Load config
     config_path = Path('config/default_config.yaml')
-    with open(config_path, 'r') as f:
-        config = yaml.safe_load(f)
+    config = load_config(str(config_path))
     
     # Select device
     device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
@@ -29,14 +34,12 @@ def run_ethernet_ip_example():
         # 1. Create mutation engine
         print("\n1. Initialize mutation engine...")
         protocol_config = config['protocols']['ethernet_ip']
-        mutation_engine = MutationEngine(protocol_config)
+        mutation_engine = get_mutation_engine(protocol_config)
         
-        # Example message: EtherNet/IP RegisterSession
-        example_message = bytes.fromhex(
-            "00650004000000000000000000000000000000000100"
-        )
+        # Example message: EtherNet/IP RegisterSession, kept as a uint8 buffer
+        example_message = np.frombuffer(_EXAMPLE_REGISTER_SESSION, dtype=np.uint8)
         
-        print(f"Original message: {example_message.hex()}")
+        print(f"Original message: {example_message.tobytes().hex()}")
         
         # Apply mutation
         mutation_actions = {
@@ -49,55 +52,56 @@ def run_ethernet_ip_example():
             example_message, mutation_actions
         )
         
-        print(f"Mutated message: {mutated_message.hex()}")
+        print(f"Mutated message: {mutated_message.tobytes().hex()}")
         print(f"Length change: {len(example_message)} -> {len(mutated_message)}")
         
         # 2. Create environment and agents
         print("\n2. Initialize environment and agents...")
-        environment = PowerIoTEnvironment(
-            protocols=['ethernet_ip'],
-            config=config
-        )
+        environment = PrefetchingEnv(get_environment(('ethernet_ip',), str(config_path)))
         
-        shared_value_network = ValueNetwork(
-            state_dim=200,
-            action_dim=8
-        ).to(device)
+        shared_value_network = get_value_network(200, 8, device)
         
-        agent_array = AgentArray(
-            protocol_name='ethernet_ip',
-            field_config=protocol_config['fields'],
-            shared_value_network=shared_value_network,
-            device=device
-        )
+        agent_array = build_agent_array('ethernet_ip', protocol_config['fields'], shared_value_network, device)
         
         # 3. Demonstrate agent decision making
         print("\n3. Demonstrate agent decisions...")
         observations = environment.reset()
         
-        for step in range(2):
-            print(f"\nDecision step {step + 1}:")
-            
-            # Show current observation
-            for field_name, observation in observations['ethernet_ip'].items():
-                if isinstance(observation, torch.Tensor):
-                    print(f"  {field_name} observation: shape {observation.shape}")
-            
-            # Agents select actions
-            actions = agent_array.select_actions(observations['ethernet_ip'])
-            
-            # Show selected actions
-            for field_name, action in actions.items():
-                print(f"  {field_name}: action {action.item()}")
-            
-            # Step environment
-            next_observations, reward, done, info = environment.step(
-                {'ethernet_ip': actions}
-            )
-            
-            print(f"  Reward: {reward:.4f}")
-            
-            observations = next_observations
+        step_log = []
+        
+        with torch.inference_mode():
+            for step in range(2):
+                # Agents select actions
+                actions = agent_array.select_actions_tensor(observations['ethernet_ip'])
+                
+                # Step environment on the worker thread
+                environment.step_async({'ethernet_ip': actions})
+                
+                # Record current observation shapes while the step runs
+                observation_shapes = {
+                    field_name: observation.shape
+                    for field_name, observation in observations['ethernet_ip'].items()
+                    if isinstance(observation, torch.Tensor)
+                }
+                
+                next_observations, reward, done, info = environment.get()
+                
+                step_log.append((actions, (observation_shapes, reward)))
+                observations = next_observations
+        
+        # The environment is cached by get_environment for later examples; only stop the worker
+        environment.close(close_env=False)
+        
+        def log_step(step, actions_cpu, details):
+            observation_shapes, reward = details
+            logger.debug("Decision step %d:", step)
+            for field_name, shape in observation_shapes.items():
+                logger.debug("  %s observation: shape %s", field_name, shape)
+            for field_name, action in zip(agent_array.field_order, actions_cpu):
+                logger.debug("  %s: action %d", field_name, action)
+            logger.debug("  Reward: %.4f", float(reward) if isinstance(reward, torch.Tensor) else reward)
+        
+        log_steps(logger, step_log, log_step)
         
         print("\n4. Example finished!")
         
@@ -106,4 +110,5 @@ def run_ethernet_ip_example():
         raise
 
 if __name__ == "__main__":
+    setup_example("EtherNet/IP fuzzing example")
     run_ethernet_ip_example()
\ No newline at end of file
@@ -3,14 +3,16 @@
 Modbus TCP protocol fuzzing example
 """
 
+import logging
 import torch
-import yaml
 from pathlib import Path
 
-from src.core.agent_array import AgentArray
-from src.core.value_network import ValueNetwork
-from src.environment.power_iot_env import PowerIoTEnvironment
-from src.fuzzing.test_case_generator import TestCaseGenerator
+from src.fuzzing.test_case_generator import TestCasePriority
+from src.fuzzing._factories import get_test_case_generator
+from src.utils.config_loader import load_config
+from examples._shared import get_value_network, get_environment, build_agent_array, setup_example, log_steps
+
+logger = logging.getLogger(__name__)
 
 def run_modbus_example():
     """Run Modbus TCP example"""
@@ -18,8 +20,7 @@ def run_modbus_example():
     
     # Load config
     config_path = Path('config/default_config.yaml')
-    with open(config_path, 'r') as f:
-        config = yaml.safe_load(f)
+    config = load_config(str(config_path))
     
     # Select device
     device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
@@ -28,72 +29,71 @@ def run_modbus_example():
     try:
         # 1. Create test case generator
         print("\n1. Initialize test case generator...")
-        test_generator = TestCaseGenerator(config['protocols'])
+        test_generator = get_test_case_generator(config['protocols'])
         
         # Generate test cases
-        test_cases = test_generator.generate_test_cases(
+        test_cases = test_generator.generate_test_cases_batched(
             protocol='modbus_tcp',
             count=5,
-            priority=2  # MEDIUM
+            priority=TestCasePriority.MEDIUM
         )
+        payload, lengths = test_cases['payload'], test_cases['lengths']
         
-        print(f"Generated {len(test_cases)} test cases")
-        for i, test_case in enumerate(test_cases):
-            print(f"  Case {i+1}: {test_case['id']}, data length: {len(test_case['mutated_data'])}")
+        print(f"Generated {len(test_cases['ids'])} test cases")
+        for i in test_cases['ids']:
+            print(f"  Case {i+1}: modbus_tcp_test_{i}, data: {payload[i, :lengths[i]].tobytes().hex()}")
         
         # 2. Create environment
         print("\n2. Initialize Power IoT environment...")
-        environment = PowerIoTEnvironment(
-            protocols=['modbus_tcp'],
-            config=config
-        )
+        environment = get_environment(('modbus_tcp',), str(config_path))
         
         # 3. Create agent array (randomly initialized models)
         print("\n3. Initialize agent array...")
         protocol_config = config['protocols']['modbus_tcp']
-        shared_value_network = ValueNetwork(
-            state_dim=100,  # simplified dimension
-            action_dim=8
-        ).to(device)
+        shared_value_network = get_value_network(100, 8, device)  # simplified dimension
         
-        agent_array = AgentArray(
-            protocol_name='modbus_tcp',
-            field_config=protocol_config['fields'],
-            shared_value_network=shared_value_network,
-            device=device
-        )
+        agent_array = build_agent_array('modbus_tcp', protocol_config['fields'], shared_value_network, device)
         
         print(f"Created agent array with {len(agent_array.agents)} agents")
         for agent in agent_array.agents:
-            print(f"  - {agent.field_name}: state dim {agent.policy_network.network[0].in_features}")
+            print(f"  - {agent.field_name}: state dim {protocol_config['fields'][agent.field_name]['state_dim']}")
         
         # 4. Run a simple test loop
         print("\n4. Run test loop...")
         observations = environment.reset()
         
-        for step in range(3):  # run 3 steps
-            print(f"\nStep {step + 1}:")
-            
-            # Agents select actions
-            actions = agent_array.select_actions(observations['modbus_tcp'])
-            print(f"  Selected actions: {actions}")
-            
-            # Step environment
-            next_observations, reward, done, info = environment.step(
-                {'modbus_tcp': actions}
-            )
-            
-            print(f"  Reward: {reward:.4f}")
-            print(f"  Done: {done}")
-            
-            if 'vulnerabilities_found' in info and info['vulnerabilities_found']:
-                print(f"  Vulnerabilities found: {len(info['vulnerabilities_found'])}")
+        step_log = []
+        
+        with torch.inference_mode():
+            for step in range(3):  # run 3 steps
+                # Agents select actions
+                actions = agent_array.select_actions_tensor(observations['modbus_tcp'])
+                
+                # Step environment
+                next_observations, reward, done, info = environment.step(
+                    {'modbus_tcp': actions}
+                )
+                
+                step_log.append((actions, (reward, done, len(info.get('vulnerabilities_found') or []))))
+                observations = next_observations
+                
+                if done:
+                    break
+        
+        def log_step(step, actions_cpu, details):
+            reward, done, vulnerability_count = details
+            logger.debug("Step %d:", step)
+            logger.debug("  Selected actions: %s", dict(zip(agent_array.field_order, actions_cpu)))
+            logger.debug("  Reward: %.4f", float(reward) if isinstance(reward, torch.Tensor) else reward)
+            logger.debug("  Done: %s", done)
             
-            observations = next_observations
+            if vulnerability_count:
+                logger.debug("  Vulnerabilities found: %d", vulnerability_count)
             
             if done:
-                print("  Environment terminated early")
-                break
+                logger.debug("  Environment terminated early")
+        
+        log_steps(logger, step_log, log_step)
         
         print("\n5. Example finished!")
         
@@ -102,4 +102,5 @@ def run_modbus_example():
         raise
 
 if __name__ == "__main__":
+    setup_example("Modbus TCP fuzzing example")
     run_modbus_example()
\ No newline at end of file
@@ -4,15 +4,17 @@ Siemens S7 protocol fuzzing example
 Demonstrates multi-agent collaboration and reward calculation
 """
 
+import logging
 import torch
-import yaml
 from pathlib import Path
 
-from src.core.agent_array import AgentArray
-from src.core.value_network import ValueNetwork
-from src.environment.power_iot_env import PowerIoTEnvironment
 from src.training.reward_calculator import RewardCalculator
 from src.fuzzing.coverage_tracker import CoverageTracker
+from src.utils.config_loader import load_config
+from src.environment.prefetching_env import PrefetchingEnv
+from examples._shared import get_value_network, get_environment, build_agent_array, setup_example, log_steps
+
+logger = logging.getLogger(__name__)
 
 def run_siemens_s7_example():
     """Run Siemens S7 example"""
@@ -20,8 +22,7 @@ def run_siemens_s7_example():
     
     # Load config
     config_path = Path('config/default_config.yaml')
-    with open(config_path, 'r') as f:
-        config = yaml.safe_load(f)
+    config = load_config(str(config_path))
     
     # Select device
     device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
@@ -77,23 +78,12 @@ def run_siemens_s7_example():
         
         # 3. Multi-agent collaboration demo
         print("\n3. Multi-agent collaboration demo...")
-        environment = PowerIoTEnvironment(
-            protocols=['siemens_s7'],
-            config=config
-        )
+        environment = PrefetchingEnv(get_environment(('siemens_s7',), str(config_path)))
         
         protocol_config = config['protocols']['siemens_s7']
-        shared_value_network = ValueNetwork(
-            state_dim=150,
-            action_dim=8
-        ).to(device)
-        
-        agent_array = AgentArray(
-            protocol_name='siemens_s7',
-            field_config=protocol_config['fields'],
-            shared_value_network=shared_value_network,
-            device=device
-        )
+        shared_value_network = get_value_network(150, 8, device)
+        
+        agent_array = build_agent_array('siemens_s7', protocol_config['fields'], shared_value_network, device)
         
         print(f"  Siemens S7 agent array has {len(agent_array.agents)} agents:")
         for agent in agent_array.agents:
@@ -101,36 +91,60 @@ def run_siemens_s7_example():
         
         # 4. Run collaboration test
         print("\n4. Run collaboration test...")
+        # Drawn once from the array's own generator and reused for every field without an observation
+        default_obs = torch.randn(10, device=device, generator=agent_array.generator)
+        
+        def gather_field_observations(observations):
+            return {
+                agent.field_name: observations['siemens_s7'].get(agent.field_name, default_obs)
+                for agent in agent_array.agents
+            }
+        
         observations = environment.reset()
+        staged_observations = agent_array.prefetch_observations(gather_field_observations(observations))
         
         collaboration_rewards = []
         
-        for step in range(3):
-            print(f"\n  Collaboration step {step + 1}:")
-            
-            # Each agent selects actions
-            individual_actions = {}
-            for agent in agent_array.agents:
-                observation = observations['siemens_s7'].get(agent.field_name, torch.randn(10))
-                action = agent.select_action(observation)
-                individual_actions[agent.field_name] = action
-                print(f"    {agent.field_name} action: {action.item()}")
-            
-            # Merge into global action
-            global_observation = agent_array.get_global_observation(
-                observations['siemens_s7']
-            )
-            print(f"    Global observation shape: {global_observation.shape}")
-            
-            # Step environment
-            next_observations, reward, done, info = environment.step(
-                {'siemens_s7': individual_actions}
-            )
-            
-            collaboration_rewards.append(reward)
-            print(f"    Collaboration reward: {reward:.4f}")
-            
-            observations = next_observations
+        step_log = []
+        
+        with torch.inference_mode():
+            for step in range(3):
+                # All agents select actions in one batched forward
+                individual_actions = agent_array.select_actions_tensor(staged_observations)
+                
+                # Step environment on the worker thread
+                environment.step_async({'siemens_s7': individual_actions})
+                
+                # Merge into global observation while the step runs; only its shape is kept
+                global_observation = agent_array.get_global_observation(
+                    observations['siemens_s7'], out=agent_array.global_obs_buffer
+                )
+                
+                next_observations, reward, done, info = environment.get()
+                
+                # Start the next step's H2D copy while this step's bookkeeping runs
+                staged_observations = agent_array.prefetch_observations(
+                    gather_field_observations(next_observations)
+                )
+                
+                collaboration_rewards.append(reward)
+                step_log.append((individual_actions, (global_observation.shape, reward)))
+                
+                observations = next_observations
+        
+        def log_step(step, actions_cpu, details):
+            global_shape, reward = details
+            logger.debug("  Collaboration step %d:", step)
+            for field_name, action in zip(agent_array.field_order, actions_cpu):
+                logger.debug("    %s action: %d", field_name, action)
+            logger.debug("    Global observation shape: %s", global_shape)
+            logger.debug("    Collaboration reward: %.4f",
+                         float(reward) if isinstance(reward, torch.Tensor) else reward)
+        
+        log_steps(logger, step_log, log_step)
+        
+        # The environment is cached by get_environment for later examples; only stop the worker
+        environment.close(close_env=False)
         
         avg_collaboration_reward = sum(collaboration_rewards) / len(collaboration_rewards)
         print(f"\n  Average collaboration reward: {avg_collaboration_reward:.4f}")
@@ -156,4 +170,5 @@ def run_siemens_s7_example():
         raise
 
 if __name__ == "__main__":
+    setup_example("Siemens S7 fuzzing example")
     run_siemens_s7_example()
\ No newline at end of file
@@ -5,8 +5,8 @@ Used to capture protocol communication data from real devices
 """
 
 import argparse
+import asyncio
 import logging
-import time
 from pathlib import Path
 from typing import List
 
@@ -20,37 +20,60 @@ def setup_logging():
         format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
     )
 
-def collect_modbus_data(output_dir: Path, duration: int):
+async def collect_modbus_data(output_dir: Path, duration: int):
     """Collect Modbus TCP data"""
     logger = logging.getLogger(__name__)
     logger.info(f"Start collecting Modbus TCP data, duration: {duration} seconds")
     
     # Actual Modbus data collection code should be implemented here
-    # Use pymodbus or other libraries to communicate with devices
-    time.sleep(1)  # simulate data collection
+    # Use pymodbus.client.AsyncModbusTcpClient so captures overlap with other protocols;
+    # strict-compliance PLCs need one outstanding request per connection (asyncio.Lock)
+    await asyncio.sleep(1)  # simulate data collection
     
     logger.info("Modbus TCP data collection completed")
 
-def collect_ethernet_ip_data(output_dir: Path, duration: int):
+async def collect_ethernet_ip_data(output_dir: Path, duration: int):
     """Collect EtherNet/IP data"""
     logger = logging.getLogger(__name__)
     logger.info(f"Start collecting EtherNet/IP data, duration: {duration} seconds")
     
     # Actual EtherNet/IP data collection code should be implemented here
-    time.sleep(1)  # simulate data collection
+    await asyncio.sleep(1)  # simulate data collection
     
     logger.info("EtherNet/IP data collection completed")
 
-def collect_siemens_s7_data(output_dir: Path, duration: int):
+async def collect_siemens_s7_data(output_dir: Path, duration: int):
     """Collect Siemens S7 data"""
     logger = logging.getLogger(__name__)
     logger.info(f"Start collecting Siemens S7 data, duration: {duration} seconds")
     
     # Actual S7 data collection code should be implemented here
-    time.sleep(1)  # simulate data collection
+    # snap7 is blocking; run its reads with asyncio.to_thread to keep the loop free
+    await asyncio.sleep(1)  # simulate data collection
     
     logger.info("Siemens S7 data collection completed")
 
+# Protocol name -> collector coroutine
+COLLECTORS = {
+    'modbus_tcp': collect_modbus_data,
+    'ethernet_ip': collect_ethernet_ip_data,
+    'siemens_s7': collect_siemens_s7_data
+}
+
+async def collect_protocols(protocols: List[str], output_dir: Path, duration: int):
+    """Collect all protocols concurrently; capture is I/O-bound so waits overlap"""
+    logger = logging.getLogger(__name__)
+    
+    tasks = []
+    for protocol in protocols:
+        collector = COLLECTORS.get(protocol)
+        if collector is None:
+            logger.warning(f"Unsupported protocol: {protocol}")
+            continue
+        tasks.append(collector(output_dir, duration))
+    
+    await asyncio.gather(*tasks)
+
 def main():
     parser = argparse.ArgumentParser(description='Industrial protocol data collection')
     parser.add_argument('--output', type=str, default='data/raw',
@@ -70,15 +93,7 @@ def main():
     output_dir.mkdir(parents=True, exist_ok=True)
     
     try:
-        for protocol in args.protocols:
-            if protocol == 'modbus_tcp':
-                collect_modbus_data(output_dir, args.duration)
-            elif protocol == 'ethernet_ip':
-                collect_ethernet_ip_data(output_dir, args.duration)
-            elif protocol == 'siemens_s7':
-                collect_siemens_s7_data(output_dir, args.duration)
-            else:
-                logger.warning(f"Unsupported protocol: {protocol}")
+        asyncio.run(collect_protocols(args.protocols, output_dir, args.duration))
         
         logger.info("All protocol data collection completed")
         
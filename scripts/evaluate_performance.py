@@ -5,16 +5,52 @@ Compare against baseline methods
 """
 
 import torch
-import yaml
 import argparse
+import csv
 import logging
-import pandas as pd
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from typing import Dict, List, Any
 
 from src.evaluation.metrics_calculator import MetricsCalculator
 from src.evaluation.baseline_comparison import BaselineComparator
 from src.evaluation.vulnerability_analyzer import VulnerabilityAnalyzer
+from src.utils.config_loader import load_config
+
+def _eval_one(baseline: str, protocols: List[str], duration: int) -> Dict[str, Any]:
+    """Evaluate one baseline in a worker process"""
+    # Each worker builds its own comparator; instances are not shared across processes
+    return BaselineComparator([baseline]).evaluate_baseline(
+        baseline_name=baseline,
+        protocols=protocols,
+        duration=duration
+    )
+
+def _persist(results: Dict[str, Any], baselines: List[str], output_path: Path):
+    """Write the CSV, markdown report and charts; runs in a background process"""
+    baseline_comparator = BaselineComparator(baselines)
+    
+    # Generate comparison report
+    comparison_report = baseline_comparator.generate_comparison_report(results)
+    
+    output_path.mkdir(parents=True, exist_ok=True)
+    
+    # Save detailed results, one row per method over the union of metric keys
+    metric_keys = list(dict.fromkeys(key for result in results.values() for key in result))
+    with open(output_path / 'detailed_results.csv', 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=['method', *metric_keys])
+        writer.writeheader()
+        for method, result in results.items():
+            writer.writerow({'method': method, **result})
+    
+    # Save comparison report
+    with open(output_path / 'comparison_report.md', 'w') as f:
+        f.write(comparison_report)
+    
+    # Generate charts
+    baseline_comparator.generate_performance_charts(results, output_path)
 
 def evaluate_omnifuzz_performance():
     """Evaluate OmniFuzz performance"""
@@ -34,15 +70,14 @@ def evaluate_omnifuzz_performance():
     logger = logging.getLogger(__name__)
     
     # Load config
-    with open(args.config, 'r') as f:
-        config = yaml.safe_load(f)
+    config = load_config(args.config)
+    protocols = list(config['protocols'])
     
     try:
         logger.info("Start performance evaluation...")
         
         # Initialize evaluation components
         metrics_calculator = MetricsCalculator()
-        baseline_comparator = BaselineComparator(args.baselines)
         vulnerability_analyzer = VulnerabilityAnalyzer()
         
         # Evaluation metrics
@@ -61,50 +96,39 @@ def evaluate_omnifuzz_performance():
         logger.info("Evaluating OmniFuzz...")
         omnifuzz_results = metrics_calculator.evaluate_omnifuzz(
             models_dir=args.models_dir,
-            protocols=config['protocols'].keys(),
+            protocols=protocols,
             duration=1800  # 30 minutes
         )
         results['OmniFuzz'] = omnifuzz_results
         
-        # Evaluate baselines
-        for baseline in args.baselines:
-            logger.info(f"Evaluating {baseline}...")
-            baseline_results = baseline_comparator.evaluate_baseline(
-                baseline_name=baseline,
-                protocols=config['protocols'].keys(),
-                duration=1800
+        # Evaluate baselines; they share no state, so run them side by side
+        logger.info(f"Evaluating {len(args.baselines)} baselines in parallel...")
+        processes = min(len(args.baselines), os.cpu_count() or 1)
+        with multiprocessing.get_context('spawn').Pool(processes=processes) as pool:
+            results_list = pool.starmap(
+                _eval_one, [(baseline, protocols, 1800) for baseline in args.baselines]
             )
-            results[baseline] = baseline_results
-        
-        # Generate comparison report
-        comparison_report = baseline_comparator.generate_comparison_report(results)
-        
-        # Save results
-        output_path = Path(args.output_dir)
-        output_path.mkdir(parents=True, exist_ok=True)
         
-        # Save detailed results
-        results_df = pd.DataFrame.from_dict(results, orient='index')
-        results_df.to_csv(output_path / 'detailed_results.csv')
-        
-        # Save comparison report
-        with open(output_path / 'comparison_report.md', 'w') as f:
-            f.write(comparison_report)
+        for baseline, baseline_results in zip(args.baselines, results_list):
+            results[baseline] = baseline_results
         
-        # Generate charts
-        baseline_comparator.generate_performance_charts(results, output_path)
+        # Persist results in the background while key metrics are printed
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as persist_pool:
+            persisted = persist_pool.submit(_persist, results, args.baselines, Path(args.output_dir))
+            
+            # Print key metrics
+            print("\n=== Key metrics comparison ===")
+            for metric in evaluation_metrics:
+                print(f"\n{metric.replace('_', ' ').title()}:")
+                for method, result in results.items():
+                    if metric in result:
+                        print(f"  {method:15}: {result[metric]}")
+            
+            persisted.result()
         
         logger.info("Performance evaluation completed!")
         logger.info(f"Results saved to: {args.output_dir}")
         
-        # Print key metrics
-        print("\n=== Key metrics comparison ===")
-        for metric in evaluation_metrics:
-            print(f"\n{metric.replace('_', ' ').title()}:")
-            for method, result in results.items():
-                if metric in result:
-                    print(f"  {method:15}: {result[metric]}")
-        
     except Exception as e:
         logger.error(f"Error during evaluation: {e}")
         raise
@@ -5,19 +5,30 @@ Run concurrent multi-protocol fuzzing with trained models
 """
 
 import torch
-import yaml
+import torch.multiprocessing as mp
 import argparse
+import hashlib
 import logging
+import pickle
+import queue
 import time
+import traceback
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Tuple
 
-from src.core.agent_array import AgentArray
+from src.core.agent_array import AgentArray, GraphedActionSelector, compile_in_place
 from src.core.value_network import ValueNetwork
 from src.environment.power_iot_env import PowerIoTEnvironment
+from src.environment.prefetching_env import PrefetchingEnv
 from src.fuzzing.mutation_engine import MutationEngine
 from src.fuzzing.coverage_tracker import CoverageTracker
 from src.utils.monitoring import ResourceMonitor
+from src.utils.config_loader import load_config
+from src.utils.checkpoint_bundle import (
+    SAFETENSORS_AVAILABLE, BUNDLE_NAME, write_bundle, load_bundle, bundle_state_dict
+)
 
 def setup_logging():
     """Configure logging"""
@@ -30,18 +41,84 @@ def setup_logging():
         ]
     )
 
-def load_config(config_path: str) -> Dict[str, Any]:
-    """Load configuration file"""
-    with open(config_path, 'r') as f:
-        config = yaml.safe_load(f)
-    return config
+def _load_checkpoint(path: Path, device: torch.device) -> Dict[str, torch.Tensor]:
+    """Read a state_dict straight onto the target device"""
+    # mmap avoids a full userspace copy; weights_only refuses arbitrary pickled code
+    return torch.load(path, map_location=device, mmap=True, weights_only=True)
+
+def consolidate_protocol_checkpoints(protocol_path: Path) -> bool:
+    """Merge a protocol's value_network.pth and agent_*.pth files into one safetensors bundle"""
+    if not SAFETENSORS_AVAILABLE:
+        logging.warning("safetensors is not installed; keeping per-agent checkpoints")
+        return False
+    
+    value_path = protocol_path / "value_network.pth"
+    value_state = torch.load(value_path, map_location='cpu', weights_only=True) if value_path.exists() else {}
+    policy_states = {
+        model_path.stem[len("agent_"):]: torch.load(model_path, map_location='cpu', weights_only=True)
+        for model_path in sorted(protocol_path.glob("agent_*.pth"))
+    }
+    
+    if not value_state and not policy_states:
+        return False
+    write_bundle(protocol_path / BUNDLE_NAME, value_state, policy_states)
+    return True
+
+def load_shared_value_networks(models_dir: str, protocols: List[str],
+                               protocol_cfgs: Dict[str, Dict[str, Any]]) -> Dict[Tuple[int, int], ValueNetwork]:
+    """Load each distinct value network once on CPU and move it to shared memory for CPU workers"""
+    value_nets: Dict[Tuple[int, int], ValueNetwork] = {}
+    cpu = torch.device('cpu')
+    
+    for protocol in protocols:
+        protocol_path = Path(models_dir) / protocol
+        if not protocol_path.exists():
+            continue
+        
+        protocol_config = protocol_cfgs[protocol]
+        dims = (protocol_config.get('state_dim', 1000), protocol_config.get('action_dim', 8))
+        if dims not in value_nets:
+            value_nets[dims] = ValueNetwork(state_dim=dims[0], action_dim=dims[1])
+        
+        bundle_path = protocol_path / BUNDLE_NAME
+        value_net_path = protocol_path / "value_network.pth"
+        if SAFETENSORS_AVAILABLE and bundle_path.exists():
+            value_state = bundle_state_dict(load_bundle(bundle_path, cpu), "value.")
+        elif value_net_path.exists():
+            value_state = _load_checkpoint(value_net_path, cpu)
+        else:
+            value_state = {}
+        
+        # The latest protocol's checkpoint wins, as in load_trained_models
+        if value_state:
+            value_nets[dims].load_state_dict(value_state)
+    
+    for value_network in value_nets.values():
+        value_network.share_memory()
+    return value_nets
 
 def load_trained_models(models_dir: str, protocols: List[str], 
-                       config: Dict[str, Any], device: torch.device) -> Dict[str, AgentArray]:
-    """Load trained models"""
+                       protocol_cfgs: Dict[str, Dict[str, Any]], device: torch.device,
+                       shared_value_networks: Optional[Dict[Tuple[int, int], ValueNetwork]] = None
+                       ) -> Dict[str, AgentArray]:
+    """Load trained models; protocol_cfgs maps protocol name -> its config['protocols'] section
+    
+    Value networks found in shared_value_networks (keyed by (state_dim, action_dim))
+    are used as loaded and not read from disk again.
+    """
     agent_arrays = {}
     models_path = Path(models_dir)
     
+    # Protocols with matching dims share one value network
+    value_nets: Dict[Tuple[int, int], ValueNetwork] = dict(shared_value_networks or {})
+    preloaded = set(value_nets)
+    
+    # (protocol, field name) or (dims, None) for a value network -> (module, checkpoint path)
+    checkpoints = {}
+    
+    # protocol -> (bundle path, value network, {field name: policy network})
+    bundles = {}
+    
     for protocol in protocols:
         protocol_path = models_path / protocol
         
@@ -49,42 +126,123 @@ def load_trained_models(models_dir: str, protocols: List[str],
             logging.warning(f"Model directory for protocol {protocol} does not exist: {protocol_path}")
             continue
             
-        # Create shared value network
-        state_dim = config['protocols'][protocol].get('state_dim', 1000)
-        action_dim = config['protocols'][protocol].get('action_dim', 8)
-        shared_value_network = ValueNetwork(
-            state_dim=state_dim,
-            action_dim=action_dim
-        ).to(device)
+        protocol_config = protocol_cfgs[protocol]
         
-        # Load value network
-        value_net_path = protocol_path / "value_network.pth"
-        if value_net_path.exists():
-            shared_value_network.load_state_dict(torch.load(value_net_path))
+        # Create or reuse shared value network
+        state_dim = protocol_config.get('state_dim', 1000)
+        action_dim = protocol_config.get('action_dim', 8)
+        dims = (state_dim, action_dim)
+        if dims not in value_nets:
+            value_nets[dims] = ValueNetwork(
+                state_dim=state_dim,
+                action_dim=action_dim
+            ).to(device)
+            if device.type == 'cuda':
+                # In place, so state_dict keys match the checkpoints
+                compile_in_place(value_nets[dims])
+        shared_value_network = value_nets[dims]
         
         # Create agent array
-        protocol_config = config['protocols'][protocol]
         agent_array = AgentArray(
             protocol_name=protocol,
             field_config=protocol_config['fields'],
             shared_value_network=shared_value_network,
             device=device
         )
+        agent_arrays[protocol] = agent_array
+        
+        # One bundle per protocol replaces the per-module .pth files when present
+        bundle_path = protocol_path / BUNDLE_NAME
+        if SAFETENSORS_AVAILABLE and bundle_path.exists():
+            bundles[protocol] = (
+                bundle_path, None if dims in preloaded else shared_value_network,
+                {agent.field_name: agent.policy_network for agent in agent_array.agents}
+            )
+            continue
+        
+        # The latest protocol's checkpoint wins for a shared network
+        value_net_path = protocol_path / "value_network.pth"
+        if value_net_path.exists() and dims not in preloaded:
+            checkpoints[(dims, None)] = (shared_value_network, value_net_path)
         
-        # Load each agent's policy network
         for agent in agent_array.agents:
             model_path = protocol_path / f"agent_{agent.field_name}.pth"
             if model_path.exists():
-                agent.policy_network.load_state_dict(torch.load(model_path))
+                checkpoints[(protocol, agent.field_name)] = (agent.policy_network, model_path)
             else:
                 logging.warning(f"Model file for agent {agent.field_name} does not exist: {model_path}")
-        
-        agent_arrays[protocol] = agent_array
+    
+    # Checkpoint reads are I/O bound, so overlap them on a thread pool
+    with ThreadPoolExecutor(max_workers=min(32, max(1, len(checkpoints) + len(bundles)))) as pool:
+        futures = {
+            key: pool.submit(_load_checkpoint, path, device)
+            for key, (_, path) in checkpoints.items()
+        }
+        bundle_futures = {
+            protocol: pool.submit(load_bundle, path, device)
+            for protocol, (path, _, _) in bundles.items()
+        }
+    
+    # assign=True adopts the loaded tensors instead of copying into the fresh ones
+    for key, (module, _) in checkpoints.items():
+        module.load_state_dict(futures[key].result(), assign=True)
+    
+    for protocol, (bundle_path, value_network, networks) in bundles.items():
+        weights = bundle_futures[protocol].result()
+        value_state = bundle_state_dict(weights, "value.")
+        if value_state and value_network is not None:
+            value_network.load_state_dict(value_state, assign=True)
+        for field_name, network in networks.items():
+            state_dict = bundle_state_dict(weights, f"policy.{field_name}.")
+            if state_dict:
+                network.load_state_dict(state_dict, assign=True)
+            else:
+                logging.warning(f"No weights for agent {field_name} in {bundle_path}")
+    
+    for protocol, agent_array in agent_arrays.items():
         logging.info(f"Loaded models for protocol {protocol} with {len(agent_array.agents)} agents")
     
     return agent_arrays
 
+# Device result statuses counted as crashes: the device stopped answering or accepting connections
+CRASH_STATUSES = frozenset({'no_response', 'timeout', 'connection_error'})
+
+def vulnerability_digest(vuln: Dict) -> bytes:
+    """Identify a vulnerability by a hash of its stack trace, or of its report fields without one"""
+    key = vuln.get('stack_trace')
+    if key is None:
+        # Device-side detectors report no stack trace; hashing an empty one would merge everything
+        key = (vuln.get('type'), vuln.get('severity'), vuln.get('description'),
+               vuln.get('request_sample'), vuln.get('protocol'))
+    return hashlib.blake2b(pickle.dumps(key), digest_size=16).digest()
+
+def record_vulnerabilities(found: Dict[bytes, Dict], vulnerabilities: List[Dict]):
+    """Merge vulnerabilities into found, keeping the first record per digest and a hit count"""
+    for vuln in vulnerabilities:
+        digest = vulnerability_digest(vuln)
+        if digest in found:
+            found[digest]['count'] += 1
+        else:
+            found[digest] = {'vulnerability': vuln, 'count': 1}
+
+def cast_models_to_bf16(agent_arrays: Dict[str, AgentArray]):
+    """Store value and policy weights in BF16 for inference"""
+    # Value networks may be shared between arrays; casting twice is a no-op
+    for agent_array in agent_arrays.values():
+        agent_array.shared_value_network.to(dtype=torch.bfloat16)
+        for agent in agent_array.agents:
+            agent.policy_network.to(dtype=torch.bfloat16)
+
+def disable_jit_reoptimization():
+    """Stop TorchScript from profiling and recompiling scripted modules mid-run"""
+    # Profiling-executor re-specialization can trigger NVRTC compiles after the first iterations
+    torch._C._jit_set_profiling_mode(False)
+    torch._C._jit_set_profiling_executor(False)
+    torch.jit.set_fusion_strategy([('STATIC', 0)])
+
 def main():
+    disable_jit_reoptimization()
+    
     parser = argparse.ArgumentParser(description='OmniFuzz fuzzing runner')
     parser.add_argument('--models_dir', type=str, default='models/',
                        help='Directory of trained models')
@@ -99,6 +257,8 @@ def main():
                        help='Output directory')
     parser.add_argument('--device', type=str, default='cuda',
                        help='Device (cuda/cpu)')
+    parser.add_argument('--consolidate_checkpoints', action='store_true',
+                       help='Merge per-protocol .pth files into bundle.safetensors before loading')
     
     args = parser.parse_args()
     
@@ -120,64 +280,101 @@ def main():
     
     try:
         # Start resource monitoring
-        resource_monitor = ResourceMonitor(interval=5.0)
+        resource_monitor = ResourceMonitor(interval=5.0, max_samples=4096)
         resource_monitor.start_monitoring()
         
-        # Load trained models
-        logger.info("Loading trained models...")
-        agent_arrays = load_trained_models(
-            args.models_dir, args.protocols, config, device
-        )
+        if args.consolidate_checkpoints:
+            for protocol in args.protocols:
+                protocol_path = Path(args.models_dir) / protocol
+                if protocol_path.exists() and consolidate_protocol_checkpoints(protocol_path):
+                    logger.info(f"Consolidated agent checkpoints for {protocol}")
         
-        if not agent_arrays:
-            logger.error("No models loaded. Please check the model directory")
-            return
+        # Create coverage tracker; workers ship their executions here
+        coverage_tracker = CoverageTracker()
         
-        # Create environment
-        environment = PowerIoTEnvironment(
-            protocols=args.protocols,
-            config=config
-        )
+        # One worker process per protocol, each pinned to one GPU when CUDA is used
+        if device.type == 'cuda':
+            device_names = [f"cuda:{i % torch.cuda.device_count()}" for i in range(len(args.protocols))]
+        else:
+            device_names = ['cpu'] * len(args.protocols)
         
-        # Create coverage tracker
-        coverage_tracker = CoverageTracker()
+        # CPU workers map one shared-memory copy of each value network instead of each
+        # loading their own; GPU workers keep a copy on their own device
+        shared_value_networks = None
+        if device.type == 'cpu':
+            shared_value_networks = load_shared_value_networks(
+                args.models_dir, args.protocols, config['protocols']
+            )
         
-        # Create mutation engines
-        mutation_engines = {}
-        for protocol in args.protocols:
-            protocol_config = config['protocols'][protocol]
-            mutation_engines[protocol] = MutationEngine(protocol_config)
+        # torch.multiprocessing hands tensors over as shared-memory handles, not pickled bytes
+        context = mp.get_context('spawn')
+        result_queue = context.Queue()
+        workers = [
+            context.Process(
+                target=_protocol_worker,
+                args=(protocol, args.models_dir, config, device_name, args.duration, result_queue,
+                      shared_value_networks)
+            )
+            for protocol, device_name in zip(args.protocols, device_names)
+        ]
+        for worker in workers:
+            worker.start()
         
-        logger.info(f"Start fuzzing, duration: {args.duration} seconds")
-        start_time = time.time()
+        logger.info(f"Start fuzzing {len(workers)} protocols in parallel, duration: {args.duration} seconds")
+        start_time = time.monotonic()
+        next_log = start_time + 60.0
         
-        # Main fuzzing loop
-        test_cases_sent = 0
-        vulnerabilities_found = []
+        # Main aggregation loop
+        # Stack-trace digest -> first-seen vulnerability and hit count
+        vulnerabilities_found: Dict[bytes, Dict] = {}
         protocol_stats = {protocol: {'messages_sent': 0, 'crashes': 0} 
                          for protocol in args.protocols}
+        # Protocol -> traceback (or exit code) of workers that did not finish normally
+        failed_protocols: Dict[str, str] = {}
         
-        while time.time() - start_time < args.duration:
-            # Reset environment
-            observations = environment.reset()
-            
-            # Run one fuzzing episode
-            episode_vulnerabilities = run_fuzzing_episode(
-                agent_arrays, environment, mutation_engines, 
-                observations, coverage_tracker, config
-            )
-            
-            vulnerabilities_found.extend(episode_vulnerabilities)
-            test_cases_sent += sum(stats['messages_sent'] for stats in protocol_stats.values())
+        running = len(workers)
+        while running:
+            try:
+                protocol, episode_vulnerabilities, coverage_records, episode_counts = result_queue.get(timeout=1.0)
+            except queue.Empty:
+                if not any(worker.is_alive() for worker in workers):
+                    # Workers died without sending their sentinel
+                    break
+            else:
+                if episode_vulnerabilities is None:
+                    running -= 1
+                elif episode_vulnerabilities == 'error':
+                    # The third field carries the worker's traceback
+                    logger.error(f"Fuzzing worker for {protocol} failed:\n{coverage_records}")
+                    failed_protocols[protocol] = coverage_records
+                    running -= 1
+                else:
+                    record_vulnerabilities(vulnerabilities_found, episode_vulnerabilities)
+                    messages_sent, crashes = episode_counts
+                    protocol_stats[protocol]['messages_sent'] += messages_sent
+                    protocol_stats[protocol]['crashes'] += crashes
+                    if coverage_records:
+                        coverage_tracker.record_execution_batch(coverage_records)
             
-            # Log progress
-            elapsed = time.time() - start_time
-            if int(elapsed) % 60 == 0:  # once per minute
-                logger.info(
-                    f"Progress: {elapsed:.0f}/{args.duration}s | "
-                    f"Test cases: {test_cases_sent} | "
-                    f"Vulnerabilities: {len(vulnerabilities_found)}"
-                )
+            # Log progress once per minute
+            now = time.monotonic()
+            if now >= next_log:
+                next_log = now + 60.0
+                if logger.isEnabledFor(logging.INFO):
+                    # messages_sent counters are cumulative, so sum them only when reporting
+                    test_cases_sent = sum(stats['messages_sent'] for stats in protocol_stats.values())
+                    logger.info(
+                        f"Progress: {now - start_time:.0f}/{args.duration}s | "
+                        f"Test cases: {test_cases_sent} | "
+                        f"Vulnerabilities: {len(vulnerabilities_found)}"
+                    )
+        
+        for protocol, worker in zip(args.protocols, workers):
+            worker.join()
+            if worker.exitcode != 0 and protocol not in failed_protocols:
+                # Killed, or died before it could report
+                logger.error(f"Fuzzing worker for {protocol} exited with code {worker.exitcode}")
+                failed_protocols[protocol] = f"worker exited with code {worker.exitcode}"
         
         # Stop resource monitoring
         resource_monitor.stop_monitoring()
@@ -185,70 +382,225 @@ def main():
         # Generate report
         generate_fuzzing_report(
             output_dir, vulnerabilities_found, protocol_stats,
-            coverage_tracker, resource_monitor, args.duration
+            coverage_tracker, resource_monitor, args.duration, failed_protocols
         )
         
+        if failed_protocols:
+            raise RuntimeError(f"Fuzzing failed for {', '.join(failed_protocols)}; "
+                               f"partial results saved to: {args.output_dir}")
         logger.info(f"Fuzzing completed! Results saved to: {args.output_dir}")
         
     except Exception as e:
         logger.error(f"Error during fuzzing: {e}")
         raise
 
-def run_fuzzing_episode(agent_arrays, environment, mutation_engines, 
-                       observations, coverage_tracker, config) -> List[Dict]:
-    """Run one fuzzing episode"""
-    vulnerabilities = []
-    step_count = 0
-    max_steps = config.get('fuzzing', {}).get('max_steps_per_episode', 100)
-    
-    while step_count < max_steps:
-        # Agents select actions
-        actions = {}
-        for protocol, agent_array in agent_arrays.items():
-            if protocol in observations:
-                protocol_actions = agent_array.select_actions(observations[protocol])
-                actions[protocol] = protocol_actions
-        
-        # Step environment
-        next_observations, reward, done, info = environment.step(actions)
+def prepare_for_inference(agent_arrays: Dict[str, AgentArray], device: torch.device) -> bool:
+    """Apply inference-only transforms to loaded models; returns whether to autocast to BF16"""
+    # Action selection is argmax/sampling, so BF16 precision is plenty
+    use_bf16 = device.type == 'cuda' and torch.cuda.is_bf16_supported()
+    if use_bf16:
+        cast_models_to_bf16(agent_arrays)
+        logging.info("Running inference in BF16")
+    
+    # Inference only from here on: INT8 matmuls for unbatched policies on CPU
+    if device.type == 'cpu':
+        for agent_array in agent_arrays.values():
+            agent_array.quantize_for_inference()
+    
+    # Weights are final now, so stack them once for the vmapped batched forward
+    for agent_array in agent_arrays.values():
+        for agent in agent_array.agents:
+            agent.policy_network.eval()
+        agent_array.stack_policy_weights()
+    
+    # Trigger torch.compile before the episode loop rather than on its first step
+    for agent_array in agent_arrays.values():
+        agent_array.warm_up()
+    
+    return use_bf16
+
+class CoverageRecorder:
+    """Buffers record_execution calls so a worker can ship them to the parent's CoverageTracker"""
+    
+    def __init__(self):
+        self.records = []
+    
+    def record_execution(self, **execution):
+        self.records.append(execution)
+
+def _protocol_worker(protocol: str, models_dir: str, config: Dict[str, Any],
+                     device_name: str, duration: int, result_queue, shared_value_networks=None):
+    """Fuzz one protocol in its own process, streaming per-episode results to the parent"""
+    setup_logging()
+    disable_jit_reoptimization()
+    device = torch.device(device_name)
+    if device.type == 'cuda':
+        # Device-less CUDA calls (graph capture, default-stream waits) must target this worker's GPU
+        torch.cuda.set_device(device)
+    protocol_cfgs = {protocol: config['protocols'][protocol]}
+    environment = None
+    
+    try:
+        # Models are loaded here rather than pickled from the parent
+        agent_arrays = load_trained_models(models_dir, [protocol], protocol_cfgs, device,
+                                           shared_value_networks=shared_value_networks)
+        if not agent_arrays:
+            raise RuntimeError(f"No models loaded for {protocol}. Please check the model directory")
+        use_bf16 = prepare_for_inference(agent_arrays, device)
         
-        # Record vulnerabilities
-        if 'vulnerabilities_found' in info:
-            vulnerabilities.extend(info['vulnerabilities_found'])
+        # Create environment; steps run on a worker thread so bookkeeping can overlap them
+        environment = PrefetchingEnv(PowerIoTEnvironment(protocols=[protocol], config=config))
         
-        # Record coverage
-        if 'coverage_data' in info:
-            coverage_tracker.record_execution(
-                basic_blocks=info['coverage_data'].get('basic_blocks', []),
-                functions=info['coverage_data'].get('functions', []),
-                execution_sequence=info['coverage_data'].get('execution_sequence', [])
-            )
+        # Step shapes are fixed, so replay captured CUDA graphs for action selection
+        torch.backends.cudnn.benchmark = True
+        action_selector = GraphedActionSelector(agent_arrays)
         
-        observations = next_observations
-        step_count += 1
+        mutation_engines = {
+            protocol: MutationEngine(protocol_cfgs[protocol],
+                                     max_message_len=config['fuzzing'].get('max_test_case_len'))
+        }
         
-        if done:
-            break
+        start_time = time.monotonic()
+        while time.monotonic() - start_time < duration:
+            coverage = CoverageRecorder()
+            observations = environment.reset()
+            
+            episode_vulnerabilities, messages_sent, crashes = run_fuzzing_episode(
+                agent_arrays, environment, mutation_engines,
+                observations, coverage, config,
+                action_selector=action_selector, use_bf16=use_bf16
+            )
+            result_queue.put((protocol, episode_vulnerabilities, coverage.records, (messages_sent, crashes)))
+    except Exception:
+        # Tell the parent this protocol failed, rather than sending the finished sentinel
+        result_queue.put((protocol, 'error', traceback.format_exc(), None))
+        raise
+    else:
+        # Sentinel: this protocol finished normally
+        result_queue.put((protocol, None, None, None))
+    finally:
+        # Release the event loop and device sockets even if an episode raised
+        if environment is not None:
+            environment.close()
+
+def run_fuzzing_episode(agent_arrays, environment, mutation_engines, 
+                       observations, coverage_tracker, config,
+                       action_selector=None, use_bf16=False) -> Tuple[List[Dict], int, int]:
+    """Run one fuzzing episode; returns (vulnerabilities, messages sent, crashes)
+    
+    environment must offer step_async()/get(), e.g. PrefetchingEnv.
+    """
+    if action_selector is None:
+        action_selector = lambda obs: AgentArray.select_actions_across(agent_arrays, obs)
+    device_type = torch.device(next(iter(agent_arrays.values())).device).type
     
-    return vulnerabilities
+    vulnerabilities = []
+    messages_sent = 0
+    crashes = 0
+    step_count = 0
+    fuzzing_cfg = config.get('fuzzing', {})
+    max_steps = fuzzing_cfg.get('max_steps_per_episode', 100)
+    max_obs_len = fuzzing_cfg.get('max_obs_len', 4096)
+    
+    # Previous step's (vulnerabilities, coverage data), recorded while the next step runs
+    pending = None
+    
+    # No autograd bookkeeping anywhere in the rollout. Autocast feeds FP32 observations
+    # to BF16 weights and keeps softmax in FP32; its weight-cast cache is off because it
+    # cannot live inside a captured graph. Coverage and reports stay plain Python/FP32.
+    with torch.inference_mode(), torch.autocast(device_type=device_type, dtype=torch.bfloat16,
+                                                enabled=use_bf16, cache_enabled=False):
+        while step_count < max_steps:
+            # Agents of all protocols select actions with one forward per shape group
+            actions = action_selector(observations)
+            
+            # Step environment on its worker thread
+            environment.step_async(actions)
+            
+            if pending is not None:
+                record_step(pending, vulnerabilities, coverage_tracker)
+            
+            next_observations, reward, done, info = environment.get()
+            # Snapshot the list: the environment keeps appending to it
+            pending = (list(info.get('vulnerabilities_found', [])), info.get('coverage_data'))
+            
+            # Per-episode deltas; the parent adds them to its per-protocol totals
+            for results in info.get('fuzzing_results', {}).values():
+                messages_sent += len(results)
+                crashes += sum(result.get('status') in CRASH_STATUSES for result in results)
+            
+            # Start host-to-device copies now; action selection waits on them
+            observations = {
+                protocol: agent_arrays[protocol].prefetch_observations(
+                    fold_observations(agent_arrays[protocol], obs, max_obs_len)
+                )
+                if protocol in agent_arrays and isinstance(obs, dict) else obs
+                for protocol, obs in next_observations.items()
+            }
+            step_count += 1
+            
+            if done:
+                break
+    
+    if pending is not None:
+        record_step(pending, vulnerabilities, coverage_tracker)
+    
+    return vulnerabilities, messages_sent, crashes
+
+def _fold_obs(obs: torch.Tensor, state_dim: int, max_obs_len: int) -> torch.Tensor:
+    """Bound an observation to max_obs_len values and fold it into a (state_dim,) vector"""
+    obs = obs.reshape(-1)
+    if obs.numel() == state_dim:
+        return obs
+    
+    obs = obs[:max_obs_len]
+    if obs.numel() < state_dim:
+        return torch.nn.functional.pad(obs, (0, state_dim - obs.numel()))
+    
+    # Sum state_dim-sized chunks so every retained value still contributes
+    obs = torch.nn.functional.pad(obs, (0, -obs.numel() % state_dim))
+    return obs.view(-1, state_dim).sum(dim=0)
 
-def generate_fuzzing_report(output_dir: Path, vulnerabilities: List[Dict], 
+def fold_observations(agent_array: AgentArray, observations: Dict[str, torch.Tensor],
+                      max_obs_len: int) -> Dict[str, torch.Tensor]:
+    """Keep field observations at their policy's static input shape"""
+    return {
+        name: _fold_obs(obs, agent_array.field_config[name]['state_dim'], max_obs_len)
+        if name in agent_array.field_config else obs
+        for name, obs in observations.items()
+    }
+
+def record_step(step_results, vulnerabilities: List[Dict], coverage_tracker: CoverageTracker):
+    """Record one step's vulnerabilities and coverage"""
+    step_vulnerabilities, coverage_data = step_results
+    vulnerabilities.extend(step_vulnerabilities)
+    
+    if coverage_data is not None:
+        coverage_tracker.record_execution(
+            basic_blocks=coverage_data.get('basic_blocks', []),
+            functions=coverage_data.get('functions', []),
+            execution_sequence=coverage_data.get('execution_sequence', [])
+        )
+
+def generate_fuzzing_report(output_dir: Path, vulnerabilities: Dict[bytes, Dict], 
                           protocol_stats: Dict, coverage_tracker: CoverageTracker,
-                          resource_monitor: ResourceMonitor, duration: int):
-    """Generate fuzzing report"""
+                          resource_monitor: ResourceMonitor, duration: int,
+                          failed_protocols: Optional[Dict[str, str]] = None):
+    """Generate fuzzing report from deduplicated vulnerabilities"""
     
-    # Vulnerability statistics
+    # Vulnerability statistics over unique stack traces, in one pass
+    severity_counts = Counter(
+        (entry['vulnerability'].get('type', 'unknown'), entry['vulnerability'].get('severity', 'unknown'))
+        for entry in vulnerabilities.values()
+    )
     vulnerability_stats = {}
-    for vuln in vulnerabilities:
-        vuln_type = vuln.get('type', 'unknown')
-        severity = vuln.get('severity', 'unknown')
-        
-        if vuln_type not in vulnerability_stats:
-            vulnerability_stats[vuln_type] = {'count': 0, 'severities': {}}
-        
-        vulnerability_stats[vuln_type]['count'] += 1
-        vulnerability_stats[vuln_type]['severities'][severity] = \
-            vulnerability_stats[vuln_type]['severities'].get(severity, 0) + 1
+    for (vuln_type, severity), count in sorted(severity_counts.items()):
+        stats = vulnerability_stats.setdefault(vuln_type, {'count': 0, 'severities': {}})
+        stats['count'] += count
+        stats['severities'][severity] = count
+    
+    total_sent = sum(stats['messages_sent'] for stats in protocol_stats.values())
+    total_hits = sum(entry['count'] for entry in vulnerabilities.values())
     
     # Build report
     report = [
@@ -256,19 +608,23 @@ def generate_fuzzing_report(output_dir: Path, vulnerabilities: List[Dict],
         "=" * 50,
         f"Test duration: {duration} seconds",
         f"Start time: {time.strftime('%Y-%m-%d %H:%M:%S')}",
-        f"Total test cases: {sum(stats['messages_sent'] for stats in protocol_stats.values())}",
-        f"Total vulnerabilities: {len(vulnerabilities)}",
+        f"Total test cases: {total_sent}",
+        f"Total vulnerabilities: {len(vulnerabilities)} unique ({total_hits} hits)",
         "",
         "Protocol statistics:"
     ]
     
-    for protocol, stats in protocol_stats.items():
-        crash_rate = stats['crashes'] / max(1, stats['messages_sent']) * 100
+    for protocol, (sent, crashes) in ((p, (s['messages_sent'], s['crashes'])) for p, s in protocol_stats.items()):
         report.append(
-            f"  {protocol}: {stats['messages_sent']} messages, "
-            f"{stats['crashes']} crashes ({crash_rate:.2f}%)"
+            f"  {protocol}: {sent} messages, "
+            f"{crashes} crashes ({crashes / max(1, sent) * 100:.2f}%)"
         )
     
+    if failed_protocols:
+        report.append("\nFailed protocols (results incomplete):")
+        report.extend(f"  {protocol}: {reason.strip().splitlines()[-1]}"
+                      for protocol, reason in failed_protocols.items())
+    
     report.append("\nVulnerability statistics:")
     for vuln_type, stats in vulnerability_stats.items():
         report.append(f"  {vuln_type}: {stats['count']}")
@@ -295,18 +651,14 @@ def generate_fuzzing_report(output_dir: Path, vulnerabilities: List[Dict],
     with open(report_path, 'w', encoding='utf-8') as f:
         f.write('\n'.join(report))
     
-    # Save vulnerability details
+    # Save vulnerability details, streamed straight to the file
     if vulnerabilities:
-        vuln_details = []
-        for i, vuln in enumerate(vulnerabilities, 1):
-            vuln_details.append(f"Vulnerability #{i}:")
-            for key, value in vuln.items():
-                vuln_details.append(f"  {key}: {value}")
-            vuln_details.append("")
-        
         vuln_path = output_dir / "vulnerability_details.txt"
         with open(vuln_path, 'w', encoding='utf-8') as f:
-            f.write('\n'.join(vuln_details))
+            for i, entry in enumerate(vulnerabilities.values(), 1):
+                f.write(f"Vulnerability #{i} (hit {entry['count']} times):\n")
+                f.writelines(f"  {key}: {value}\n" for key, value in entry['vulnerability'].items())
+                f.write("\n")
     
     logging.info(f"Report generated: {report_path}")
 
@@ -5,16 +5,15 @@ Protocol-aware fuzzing framework for power IoT devices based on multi-agent rein
 """
 
 import torch
-import yaml
 import argparse
 import logging
 from pathlib import Path
-from typing import Dict, Any
 
-from src.core.agent_array import AgentArray
+from src.core.agent_array import AgentArray, compile_in_place
 from src.core.value_network import ValueNetwork
 from src.environment.power_iot_env import PowerIoTEnvironment
 from src.training.trainer import OmniFuzzTrainer
+from src.utils.config_loader import load_config
 from src.utils.data_preprocessor import DataPreprocessor
 
 def setup_logging():
@@ -28,12 +27,6 @@ def setup_logging():
         ]
     )
 
-def load_config(config_path: str) -> Dict[str, Any]:
-    """Load configuration file"""
-    with open(config_path, 'r') as f:
-        config = yaml.safe_load(f)
-    return config
-
 def main():
     parser = argparse.ArgumentParser(description='OmniFuzz training script')
     parser.add_argument('--config', type=str, default='config/default_config.yaml',
@@ -73,26 +66,33 @@ def main():
             config=config
         )
         
+        # Per-protocol config sections, looked up once
+        protocol_cfgs = {protocol: config['protocols'][protocol] for protocol in args.protocols}
+        
         # Create shared value networks
         shared_value_networks = {}
         for protocol in args.protocols:
-            state_dim = config['protocols'][protocol].get('state_dim', 1000)
-            action_dim = config['protocols'][protocol].get('action_dim', 8)
+            state_dim = protocol_cfgs[protocol].get('state_dim', 1000)
+            action_dim = protocol_cfgs[protocol].get('action_dim', 8)
             shared_value_networks[protocol] = ValueNetwork(
                 state_dim=state_dim,
                 action_dim=action_dim
             ).to(device)
+            if device.type == 'cuda':
+                # In place, so saved state_dict keys stay unprefixed
+                compile_in_place(shared_value_networks[protocol])
         
         # Create agent arrays
         agent_arrays = {}
         for protocol in args.protocols:
-            protocol_config = config['protocols'][protocol]
             agent_arrays[protocol] = AgentArray(
                 protocol_name=protocol,
-                field_config=protocol_config['fields'],
+                field_config=protocol_cfgs[protocol]['fields'],
                 shared_value_network=shared_value_networks[protocol],
                 device=device
             )
+            # Compile policy and value networks before the first episode
+            agent_arrays[protocol].warm_up()
         
         # Create trainer
         trainer = OmniFuzzTrainer(
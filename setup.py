@@ -30,6 +30,12 @@ setup(
     ],
     python_requires=">=3.9",
     install_requires=requirements,
+    extras_require={
+        # JIT for mutation kernels; NumPy fallback when absent
+        "jit": ["numba>=0.56.0"],
+        # Consolidated checkpoint bundles; per-agent .pth files when absent
+        "safetensors": ["safetensors>=0.4.0"],
+    },
     entry_points={
         "console_scripts": [
             "omnifuzz-train=scripts.train_omnifuzz:main",
@@ -11,37 +11,62 @@ __author__ = "Yubo Song, Weiwei Chen, et al."
 __email__ = "songyubo@seu.edu.cn"
 __description__ = "Multi-Agent Reinforcement Learning Framework for Protocol-Aware Fuzzing"
 
-# Core components exports
-from .core.agent_array import AgentArray
-from .core.protocol_agent import ProtocolAgent
-from .core.policy_network import PolicyNetwork, PolicyNetworkMLP
-from .core.value_network import ValueNetwork, ValueNetworkMLP
-from .core.experience_buffer import ExperienceBuffer, PrioritizedExperienceBuffer
+import importlib
 
-# Environment components exports
-from .environment.power_iot_env import PowerIoTEnvironment
-from .environment.protocol_parser import ProtocolParser
-from .environment.device_interface import DeviceInterface
-
-# Fuzzing components exports
-from .fuzzing.mutation_engine import MutationEngine, MutationAction
-from .fuzzing.test_case_generator import TestCaseGenerator, TestCasePriority
-from .fuzzing.coverage_tracker import CoverageTracker, LLVMCoverageTracker
-
-# Training components exports
-from .training.trainer import OmniFuzzTrainer
-from .training.reward_calculator import RewardCalculator
-from .training.multi_agent_coordinator import MultiAgentCoordinator
+# Public name -> submodule defining it; submodules (and torch) load on first attribute access
+_LAZY_EXPORTS = {
+    # Core components exports
+    'AgentArray': '.core.agent_array',
+    'ProtocolAgent': '.core.protocol_agent',
+    'PolicyNetwork': '.core.policy_network',
+    'PolicyNetworkMLP': '.core.policy_network',
+    'ValueNetwork': '.core.value_network',
+    'ValueNetworkMLP': '.core.value_network',
+    'ExperienceBuffer': '.core.experience_buffer',
+    'PrioritizedExperienceBuffer': '.core.experience_buffer',
+    
+    # Environment components exports
+    'PowerIoTEnvironment': '.environment.power_iot_env',
+    'ProtocolParser': '.environment.protocol_parser',
+    'DeviceInterface': '.environment.device_interface',
+    'AsyncDeviceInterface': '.environment.device_interface',
+    
+    # Fuzzing components exports
+    'MutationEngine': '.fuzzing.mutation_engine',
+    'MutationAction': '.fuzzing.mutation_engine',
+    'TestCaseGenerator': '.fuzzing.test_case_generator',
+    'TestCasePriority': '.fuzzing.test_case_generator',
+    'CoverageTracker': '.fuzzing.coverage_tracker',
+    'LLVMCoverageTracker': '.fuzzing.coverage_tracker',
+    
+    # Training components exports
+    'OmniFuzzTrainer': '.training.trainer',
+    'RewardCalculator': '.training.reward_calculator',
+    'MultiAgentCoordinator': '.training.multi_agent_coordinator',
+    
+    # Utility components exports
+    'DataPreprocessor': '.utils.data_preprocessor',
+    'ProtocolUtils': '.utils.protocol_utils',
+    'ResourceMonitor': '.utils.monitoring',
+    'PerformanceProfiler': '.utils.monitoring',
+    
+    # Evaluation components exports
+    'MetricsCalculator': '.evaluation.metrics_calculator',
+    'BaselineComparator': '.evaluation.baseline_comparison',
+    'VulnerabilityAnalyzer': '.evaluation.vulnerability_analyzer',
+}
 
-# Utility components exports
-from .utils.data_preprocessor import DataPreprocessor
-from .utils.protocol_utils import ProtocolUtils
-from .utils.monitoring import ResourceMonitor, PerformanceProfiler
+def __getattr__(name):
+    """Import exported classes on first access (PEP 562)"""
+    if name not in _LAZY_EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_LAZY_EXPORTS[name], __name__), name)
+    # Cache on the package so later lookups skip __getattr__
+    globals()[name] = value
+    return value
 
-# Evaluation components exports
-from .evaluation.metrics_calculator import MetricsCalculator
-from .evaluation.baseline_comparison import BaselineComparator
-from .evaluation.vulnerability_analyzer import VulnerabilityAnalyzer
+def __dir__():
+    return sorted(list(globals()) + list(_LAZY_EXPORTS))
 
 __all__ = [
     # Core components
@@ -49,7 +74,7 @@ __all__ = [
     'ValueNetwork', 'ValueNetworkMLP', 'ExperienceBuffer', 'PrioritizedExperienceBuffer',
     
     # Environment components
-    'PowerIoTEnvironment', 'ProtocolParser', 'DeviceInterface',
+    'PowerIoTEnvironment', 'ProtocolParser', 'DeviceInterface', 'AsyncDeviceInterface',
     
     # Fuzzing components
     'MutationEngine', 'MutationAction', 'TestCaseGenerator', 'TestCasePriority',
@@ -4,11 +4,30 @@ Core module - multi-agent reinforcement learning core components
 Includes agents, networks, and experience buffers
 """
 
-from .agent_array import AgentArray
-from .protocol_agent import ProtocolAgent
-from .policy_network import PolicyNetwork, PolicyNetworkMLP
-from .value_network import ValueNetwork, ValueNetworkMLP
-from .experience_buffer import ExperienceBuffer, PrioritizedExperienceBuffer
+import importlib
+
+# Public name -> submodule defining it; loaded on first attribute access
+_LAZY_EXPORTS = {
+    'AgentArray': '.agent_array',
+    'ProtocolAgent': '.protocol_agent',
+    'PolicyNetwork': '.policy_network',
+    'PolicyNetworkMLP': '.policy_network',
+    'ValueNetwork': '.value_network',
+    'ValueNetworkMLP': '.value_network',
+    'ExperienceBuffer': '.experience_buffer',
+    'PrioritizedExperienceBuffer': '.experience_buffer',
+}
+
+def __getattr__(name):
+    """Import exported classes on first access (PEP 562)"""
+    if name not in _LAZY_EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_LAZY_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(list(globals()) + list(_LAZY_EXPORTS))
 
 __all__ = [
     'AgentArray',
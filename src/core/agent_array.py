@@ -1,15 +1,29 @@
+import copy
+import logging
 import torch
 import torch.nn as nn
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 from .protocol_agent import ProtocolAgent
 from .policy_network import PolicyNetwork
 from .value_network import ValueNetwork
 
+def compile_in_place(module: nn.Module) -> bool:
+    """nn.Module.compile a module in place; returns False (module left eager) when unavailable"""
+    try:
+        # In place, so the module type and state_dict keys stay unchanged
+        module.compile(mode='reduce-overhead', fullgraph=True)
+    except (AttributeError, RuntimeError) as e:
+        # nn.Module.compile needs torch>=2.2
+        logging.getLogger(__name__).warning(f"torch.compile unavailable, using eager {type(module).__name__}: {e}")
+        return False
+    return True
+
 class AgentArray:
     """Protocol-specific agent array"""
     
     def __init__(self, protocol_name: str, field_config: Dict[str, Any], 
-                 shared_value_network: ValueNetwork, device: torch.device):
+                 shared_value_network: ValueNetwork, device: torch.device,
+                 quantize: bool = False, compile_networks: Optional[bool] = None, seed: int = 0):
         self.protocol_name = protocol_name
         self.field_config = field_config
         self.shared_value_network = shared_value_network
@@ -18,6 +32,58 @@ class AgentArray:
         # Create a dedicated agent for each protocol field
         self.agents = self._initialize_agents()
         
+        # One Adam over every field's policy parameters: Adam state is per parameter, so
+        # this matches per-agent optimizers with a single zero_grad/step per update
+        self.optimizer = torch.optim.Adam(
+            [param for agent in self.agents for param in agent.policy_network.parameters()],
+            lr=0.01, fused=torch.device(device).type == 'cuda'
+        )
+        
+        # Index table mapping field name -> row in batched tensors
+        self.field_order = [agent.field_name for agent in self.agents]
+        self.field_index = {name: i for i, name in enumerate(self.field_order)}
+        
+        # Column range of each field in the global observation, in field_order
+        self._global_offsets = {}
+        offset = 0
+        for name in self.field_order:
+            state_dim = self.field_config[name]['state_dim']
+            self._global_offsets[name] = (offset, offset + state_dim)
+            offset += state_dim
+        self.global_obs_dim = offset
+        
+        # Reusable output for get_global_observation(out=...); overwritten by every such call
+        self.global_obs_buffer = torch.empty(self.global_obs_dim, device=device)
+        # Returned when no field observation is present
+        self._empty_obs = torch.empty((0,), device=device)
+        
+        # Agents whose policy networks share input/output dims can be batched
+        self._agent_groups = self._group_agents_by_shape()
+        
+        # Shape group -> (meta base module, stacked params, stacked buffers); see stack_policy_weights
+        self._stacked_policies = {}
+        
+        # Per-array RNG: avoids the global generator's lock and allows deterministic replay
+        self.generator = torch.Generator(device=device)
+        self.generator.manual_seed(seed)
+        
+        # Side stream so host-to-device observation copies overlap with compute
+        self._copy_stream = torch.cuda.Stream(self.device) if torch.device(self.device).type == 'cuda' else None
+        
+        # Field name -> two pinned host buffers used alternately by prefetch_observations
+        self._staging = {}
+        self._staging_slot = 0
+        
+        # Compiled forwards take precedence over INT8 weights, which Inductor cannot fuse;
+        # by default only on CUDA, where launch overhead dominates these small MLPs
+        if compile_networks is None:
+            compile_networks = torch.device(self.device).type == 'cuda'
+        self._compiled = compile_networks and self._compile_policy_networks()
+        
+        # INT8 weights for inference-only CPU use; quantized networks cannot be trained
+        if quantize and not self._compiled and torch.device(self.device).type == 'cpu':
+            self.quantize_for_inference()
+        
     def _initialize_agents(self) -> List[ProtocolAgent]:
         """Initialize protocol-field agents"""
         agents = []
@@ -39,31 +105,401 @@ class AgentArray:
             
         return agents
     
+    def _group_agents_by_shape(self) -> Dict[Tuple[int, int], List[ProtocolAgent]]:
+        """Group agents by (state_dim, action_dim) of their policy networks"""
+        groups = {}
+        for agent in self.agents:
+            field_config = self.field_config[agent.field_name]
+            key = (field_config['state_dim'], field_config['action_dim'])
+            groups.setdefault(key, []).append(agent)
+        return groups
+    
+    def _compile_policy_networks(self) -> bool:
+        """Compile policy network forwards in place; returns False when torch.compile is unavailable"""
+        return all([compile_in_place(agent.policy_network) for agent in self.agents])
+    
+    def warm_up(self):
+        """Run one dummy forward per policy and the value network so compilation happens up front"""
+        with torch.no_grad():
+            for agent in self.agents:
+                state_dim = self.field_config[agent.field_name]['state_dim']
+                agent.policy_network(torch.zeros(1, state_dim, device=self.device))
+            
+            value_network = self.shared_value_network
+            if isinstance(value_network, ValueNetwork):
+                value_network(torch.zeros(1, value_network.state_dim, device=self.device),
+                              torch.zeros(1, value_network.action_dim, device=self.device))
+    
+    def quantize_for_inference(self, num_checks: int = 256, min_agreement: float = 0.95):
+        """Apply dynamic INT8 quantization to policy networks that are not batched (CPU only, no further training)
+        
+        Each quantized network is checked against its float version on random
+        observations; if top-1 actions agree less than min_agreement, the float
+        network is kept.
+        """
+        for key, group in self._agent_groups.items():
+            if len(group) > 1:
+                # Grouped networks keep float weights so they can be stacked for bmm
+                continue
+            
+            checks = torch.randn(num_checks, key[0], generator=self.generator)
+            for agent in group:
+                float_network = agent.policy_network.eval()
+                quantized = torch.quantization.quantize_dynamic(float_network, {nn.Linear}, dtype=torch.qint8)
+                
+                with torch.no_grad():
+                    agreement = (quantized(checks).argmax(-1) == float_network(checks).argmax(-1)).float().mean().item()
+                if agreement < min_agreement:
+                    logging.getLogger(__name__).warning(
+                        f"INT8 policy for {agent.field_name} agrees on {agreement:.1%} of actions; keeping FP32"
+                    )
+                    continue
+                agent.policy_network = quantized
+    
+    def stack_policy_weights(self):
+        """Snapshot each batchable shape group's policy weights with a leading agent dim
+        
+        Batched selection then runs one vmapped forward over the snapshot instead of
+        re-stacking weights every step. The snapshot does not follow later weight
+        changes: call again after loading or casting; update_policies drops it.
+        """
+        self._stacked_policies = {}
+        for key, group in self._agent_groups.items():
+            if len(group) == 1 or not all(self._is_batchable(agent) for agent in group):
+                continue
+            networks = [agent.policy_network for agent in group]
+            params, buffers = torch.func.stack_module_state(networks)
+            # Weightless template for functional_call; eval() makes dropout a no-op under vmap
+            base = copy.deepcopy(networks[0]).to('meta').eval()
+            self._stacked_policies[key] = (base, params, buffers)
+    
     def select_actions(self, observations: Dict[str, torch.Tensor]) -> Dict[str, torch.Tensor]:
         """Select actions for all agents"""
+        # Same-shaped fields share one forward; heterogeneous fields still run per agent
+        return self.select_actions_batched(observations)
+    
+    def prefetch_observations(self, observations: Dict[str, torch.Tensor]) -> Dict[str, torch.Tensor]:
+        """Start copying observations to the agent device on the side stream
+        
+        Copies may still be in flight on return; select_actions_tensor waits on
+        the copy stream before using them. Without CUDA this is a plain .to().
+        """
+        if self._copy_stream is None:
+            return {name: obs.to(self.device) for name, obs in observations.items()}
+        
+        # A slot is reused two calls later, after its copy has been consumed by a step
+        self._staging_slot ^= 1
+        with torch.cuda.stream(self._copy_stream):
+            staged = {
+                name: self._pinned_staging(name, obs).to(self.device, non_blocking=True) if obs.device.type == 'cpu' else obs
+                for name, obs in observations.items()
+            }
+        
+        # Keep the caching allocator from recycling these buffers while compute uses them
+        compute_stream = torch.cuda.current_stream(self.device)
+        for obs in staged.values():
+            obs.record_stream(compute_stream)
+        return staged
+    
+    def _pinned_staging(self, name: str, obs: torch.Tensor) -> torch.Tensor:
+        """Copy a CPU observation into the current pinned staging buffer for its field"""
+        buffers = self._staging.get(name)
+        if buffers is None or buffers[0].shape != obs.shape or buffers[0].dtype != obs.dtype:
+            buffers = self._staging[name] = [
+                torch.empty(obs.shape, dtype=obs.dtype, pin_memory=True) for _ in range(2)
+            ]
+        return buffers[self._staging_slot].copy_(obs)
+    
+    def select_actions_batched(self, observations: Dict[str, torch.Tensor]) -> Dict[str, torch.Tensor]:
+        """Select actions for all agents with one policy forward per shape group"""
+        actions = self.select_actions_tensor(observations)
+        return dict(zip(self.field_order, actions))
+    
+    def select_actions_tensor(self, observations: Dict[str, torch.Tensor]) -> torch.Tensor:
+        """Select actions for all agents as one (num_agents,) tensor ordered by field_order
+        
+        Actions stay on device; callers should .tolist() once per step instead of
+        calling .item() per agent.
+        """
+        return AgentArray.select_actions_across(
+            {self.protocol_name: self}, {self.protocol_name: observations}
+        )[self.protocol_name]
+    
+    @staticmethod
+    def select_actions_across(agent_arrays: Dict[str, 'AgentArray'],
+                              observations: Dict[str, Dict[str, torch.Tensor]]) -> Dict[str, torch.Tensor]:
+        """Select actions for several protocols' agent arrays with one forward per shape group
+        
+        Agents from different protocols that share (state_dim, action_dim) are
+        stacked into the same batch. Returns a (num_agents,) action tensor per
+        protocol, ordered by that array's field_order.
+        """
+        arrays = {protocol: array for protocol, array in agent_arrays.items() if protocol in observations}
+        
         actions = {}
-        for agent in self.agents:
-            obs = observations[agent.field_name]
-            action = agent.select_action(obs)
-            actions[agent.field_name] = action
+        for protocol, array in arrays.items():
+            if array._copy_stream is not None:
+                # Order compute after any copies issued by prefetch_observations
+                torch.cuda.current_stream(array.device).wait_stream(array._copy_stream)
             
+            actions[protocol] = torch.empty(len(array.field_order), dtype=torch.long, device=array.device)
+        
+        with torch.no_grad():
+            for key, members in AgentArray._pool_groups(arrays).items():
+                group = [agent for _, agent in members]
+                if len(group) == 1 or not all(AgentArray._is_batchable(agent) for agent in group):
+                    # Nothing to batch, or networks were replaced by opaque modules
+                    for protocol, agent in members:
+                        actions[protocol][arrays[protocol].field_index[agent.field_name]] = agent.select_action(
+                            observations[protocol][agent.field_name]
+                        )
+                    continue
+                
+                # Stack field observations into one (group_size, state_dim) tensor
+                device = arrays[members[0][0]].device
+                obs = torch.stack([observations[protocol][agent.field_name] for protocol, agent in members])
+                obs = obs.to(device, non_blocking=True)
+                
+                action_probs = AgentArray._batched_policy_forward(
+                    group, obs, AgentArray._pooled_stack(arrays, key)
+                )
+                # multinomial skips Categorical's per-call construction and simplex validation
+                sampled = torch.multinomial(
+                    action_probs, 1, generator=arrays[members[0][0]].generator
+                ).squeeze(-1)
+                
+                # Scatter back with one indexed write per protocol
+                positions = {}
+                for i, (protocol, agent) in enumerate(members):
+                    rows, cols = positions.setdefault(protocol, ([], []))
+                    rows.append(arrays[protocol].field_index[agent.field_name])
+                    cols.append(i)
+                for protocol, (rows, cols) in positions.items():
+                    actions[protocol][rows] = sampled[cols]
+        
         return actions
     
-    def update_policies(self, experiences: List[Dict], global_reward: float):
-        """Update policies for all agents"""
-        for agent in self.agents:
-            field_experiences = [
-                exp for exp in experiences 
-                if agent.field_name in exp['observations']
-            ]
-            if field_experiences:
-                agent.update_policy(field_experiences, global_reward)
+    @staticmethod
+    def _pool_groups(arrays: Dict[str, 'AgentArray']) -> Dict[Tuple[int, int], List[Tuple[str, ProtocolAgent]]]:
+        """Merge shape groups of several arrays into (protocol, agent) member lists"""
+        groups = {}
+        for protocol, array in arrays.items():
+            for key, group in array._agent_groups.items():
+                groups.setdefault(key, []).extend((protocol, agent) for agent in group)
+        return groups
     
-    def get_global_observation(self, individual_observations: Dict[str, torch.Tensor]) -> torch.Tensor:
-        """Combine all agent observations into a global observation"""
-        obs_list = []
-        for agent in self.agents:
-            if agent.field_name in individual_observations:
-                obs_list.append(individual_observations[agent.field_name])
+    @staticmethod
+    def _pooled_stack(arrays: Dict[str, 'AgentArray'], key: Tuple[int, int]):
+        """Stacked policy state for a pooled shape group, or None if any array has no snapshot"""
+        stacks = [array._stacked_policies.get(key) for array in arrays.values() if key in array._agent_groups]
+        if not stacks or any(stack is None for stack in stacks):
+            return None
+        if len(stacks) == 1:
+            return stacks[0]
+        
+        # Same order as _pool_groups: protocols in dict order, agents in group order
+        base = stacks[0][0]
+        params = {name: torch.cat([stack[1][name] for stack in stacks]) for name in stacks[0][1]}
+        buffers = {name: torch.cat([stack[2][name] for stack in stacks]) for name in stacks[0][2]}
+        return base, params, buffers
+    
+    @staticmethod
+    def _is_batchable(agent: ProtocolAgent) -> bool:
+        """Whether an agent's policy is a plain float PolicyNetwork whose weights can be stacked"""
+        network = agent.policy_network
+        return isinstance(network, PolicyNetwork) and all(
+            isinstance(layer, (nn.Linear, nn.ReLU, nn.Dropout, nn.Identity, nn.Softmax)) for layer in network.network
+        )
+    
+    @staticmethod
+    def _batched_policy_forward(group: List[ProtocolAgent], obs: torch.Tensor, stacked=None) -> torch.Tensor:
+        """Run same-shaped policy networks on a (group_size, input_dim) batch
+        
+        Uses one vmapped functional_call over a stack_policy_weights snapshot when
+        given, otherwise stacks the live weights into bmm calls.
+        """
+        if stacked is not None:
+            base, params, buffers = stacked
+            
+            def call_one(params, buffers, x):
+                return torch.func.functional_call(base, (params, buffers), (x,))
+            
+            return torch.vmap(call_one)(params, buffers, obs)
+        
+        hidden = obs.unsqueeze(1)
+        for layers in zip(*(agent.policy_network.network for agent in group)):
+            if isinstance(layers[0], nn.Linear):
+                weight = torch.stack([layer.weight for layer in layers])
+                bias = torch.stack([layer.bias for layer in layers])
+                hidden = torch.baddbmm(bias.unsqueeze(1), hidden, weight.transpose(1, 2))
+            else:
+                # Activation/dropout/softmax layers carry no per-agent parameters
+                hidden = layers[0](hidden)
+        return hidden.squeeze(1)
+    
+    def optimize_for_inference(self):
+        """Script and freeze policy networks for inference-only use (no further training)"""
+        if self._compiled:
+            # Already fused by torch.compile; scripting would discard the compiled forward
+            return
+        
+        for group in self._agent_groups.values():
+            if len(group) > 1:
+                # Left as plain modules so select_actions_batched can stack their weights
+                continue
+            for agent in group:
+                agent.policy_network = torch.jit.optimize_for_inference(
+                    torch.jit.script(agent.policy_network.eval())
+                )
+    
+    def update_policies(self, batch: Dict[str, Any], global_reward: float):
+        """Update policies for all agents from a batch sampled by ExperienceBuffer"""
+        # Weights are about to change, so any stacked snapshot goes stale
+        self._stacked_policies = {}
+        observations = batch.get('observations', {})
+        if not any(agent.field_name in observations for agent in self.agents):
+            return
+        
+        # Every agent shares the critic, so its values are computed once for the batch
+        with torch.no_grad():
+            values = self.shared_value_network(batch['global_observation'], batch['global_actions']).squeeze(-1)
+        advantages = global_reward - values
+        
+        losses = [
+            agent.policy_loss(batch, advantages)
+            for agent in self.agents if agent.field_name in observations
+        ]
+        losses = [loss for loss in losses if loss is not None]
+        if not losses:
+            return
+        
+        # Each loss only reaches its own agent's parameters, so one backward over the sum
+        # gives every agent the gradient it would get from its own update
+        self.optimizer.zero_grad(set_to_none=True)
+        torch.stack(losses).sum().backward()
+        self.optimizer.step()
+    
+    def get_global_observation(self, individual_observations: Dict[str, torch.Tensor],
+                               out: Optional[torch.Tensor] = None) -> torch.Tensor:
+        """Combine all agent observations into a global observation
+        
+        With every field present, slices are copied into out (e.g. global_obs_buffer)
+        or one fresh tensor; callers passing out must clone to keep the result.
+        A single present field is returned as is, not copied.
+        """
+        if len(individual_observations) >= len(self._global_offsets) and all(
+                name in individual_observations for name in self._global_offsets):
+            first = individual_observations[self.field_order[0]]
+            if out is None:
+                out = torch.empty(*first.shape[:-1], self.global_obs_dim, dtype=first.dtype, device=first.device)
+            for name, (start, end) in self._global_offsets.items():
+                out[..., start:end].copy_(individual_observations[name])
+            return out
+        
+        # Some fields missing: concatenate whatever is present, in field order
+        obs_list = [individual_observations[name] for name in self.field_order if name in individual_observations]
+        
+        if not obs_list:
+            return self._empty_obs
+        if len(obs_list) == 1:
+            return obs_list[0]
+        return torch.cat(obs_list, dim=-1)
+
+class GraphedActionSelector:
+    """CUDA-graph replay of AgentArray.select_actions_across for fixed observation shapes
+    
+    The stack -> batched policy forward -> sample -> scatter sequence is captured
+    once per observation shape signature and replayed every step. Off CUDA, or
+    when a policy cannot be batched, it falls back to the eager path.
+    """
+    
+    def __init__(self, agent_arrays: Dict[str, AgentArray]):
+        self.agent_arrays = agent_arrays
+        # shape signature -> (graph, static observations, static actions)
+        self._graphs = {}
+    
+    def __call__(self, observations: Dict[str, Dict[str, torch.Tensor]]) -> Dict[str, torch.Tensor]:
+        arrays = {protocol: array for protocol, array in self.agent_arrays.items() if protocol in observations}
+        if not self._can_capture(arrays):
+            return AgentArray.select_actions_across(self.agent_arrays, observations)
+        
+        signature = tuple(
+            (protocol, agent.field_name, tuple(observations[protocol][agent.field_name].shape))
+            for protocol, array in arrays.items() for agent in array.agents
+        )
+        if signature not in self._graphs:
+            self._graphs[signature] = self._capture(arrays, observations)
+        graph, static_obs, static_actions = self._graphs[signature]
+        
+        for array in arrays.values():
+            # Order the static copies after any copies issued by prefetch_observations
+            torch.cuda.current_stream(array.device).wait_stream(array._copy_stream)
+        for (protocol, field_name), static in static_obs.items():
+            static.copy_(observations[protocol][field_name], non_blocking=True)
+        graph.replay()
+        
+        # Static outputs are overwritten by the next replay
+        return {protocol: actions.clone() for protocol, actions in static_actions.items()}
+    
+    @staticmethod
+    def _can_capture(arrays: Dict[str, AgentArray]) -> bool:
+        """Graphs need CUDA and plain batchable policies for every agent"""
+        return bool(arrays) and all(
+            torch.device(array.device).type == 'cuda' and all(AgentArray._is_batchable(a) for a in array.agents)
+            for array in arrays.values()
+        )
+    
+    @staticmethod
+    def _capture(arrays: Dict[str, AgentArray], observations: Dict[str, Dict[str, torch.Tensor]]):
+        """Capture one action-selection step into a CUDA graph with static buffers"""
+        static_obs = {
+            (protocol, agent.field_name): observations[protocol][agent.field_name].to(array.device).clone()
+            for protocol, array in arrays.items() for agent in array.agents
+        }
+        static_actions = {
+            protocol: torch.zeros(len(array.field_order), dtype=torch.long, device=array.device)
+            for protocol, array in arrays.items()
+        }
+        
+        # Index tensors must exist before capture; host-to-device copies cannot be recorded
+        plan = []
+        for key, members in AgentArray._pool_groups(arrays).items():
+            positions = {}
+            for i, (protocol, agent) in enumerate(members):
+                rows, cols = positions.setdefault(protocol, ([], []))
+                rows.append(arrays[protocol].field_index[agent.field_name])
+                cols.append(i)
+            scatter = [
+                (protocol,
+                 torch.tensor(rows, device=arrays[protocol].device),
+                 torch.tensor(cols, device=arrays[protocol].device))
+                for protocol, (rows, cols) in positions.items()
+            ]
+            plan.append((members, AgentArray._pooled_stack(arrays, key), scatter))
+        
+        def step():
+            with torch.no_grad():
+                for members, stacked, scatter in plan:
+                    obs = torch.stack([static_obs[(protocol, agent.field_name)] for protocol, agent in members])
+                    action_probs = AgentArray._batched_policy_forward([agent for _, agent in members], obs, stacked)
+                    # Gumbel-max sampling: same distribution as Categorical, no host sync
+                    noise = torch.empty_like(action_probs).exponential_().log()
+                    sampled = (action_probs.log() - noise).argmax(dim=-1)
+                    for protocol, rows, cols in scatter:
+                        static_actions[protocol].index_copy_(0, rows, sampled.index_select(0, cols))
+        
+        # One graph records on one device: the arrays' device, not whichever is current
+        device = torch.device(next(iter(arrays.values())).device)
+        with torch.cuda.device(device):
+            # Warm up on a side stream before capture, as CUDA graphs require
+            side_stream = torch.cuda.Stream(device)
+            side_stream.wait_stream(torch.cuda.current_stream(device))
+            with torch.cuda.stream(side_stream):
+                step()
+            torch.cuda.current_stream(device).wait_stream(side_stream)
+            
+            graph = torch.cuda.CUDAGraph()
+            with torch.cuda.graph(graph):
+                step()
         
-        return torch.cat(obs_list, dim=-1) if obs_list else torch.tensor([])
\ No newline at end of file
+        return graph, static_obs, static_actions
@@ -1,83 +1,189 @@
-import random
 import numpy as np
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 import torch
 
 class ExperienceBuffer:
-    """Experience replay buffer"""
+    """Experience replay buffer
+    
+    Experiences are stored column-wise: every (nested) key of the first added
+    experience gets one preallocated (capacity, ...) NumPy array, written in
+    place at the ring position. Later experiences must keep the same shapes.
+    """
     
     def __init__(self, capacity: int):
         self.capacity = capacity
-        self.buffer = []
+        # Key path, e.g. ('observations', 'function_code') -> (capacity, ...) array
+        self.columns: Dict[Tuple[str, ...], np.ndarray] = {}
+        self.size = 0
         self.position = 0
         
+        # Pinned double buffers for CUDA batches: key -> [slot 0, slot 1], plus the
+        # event marking when each slot's last host-to-device copy has finished
+        self._staging: Dict[Tuple[str, ...], List[torch.Tensor]] = {}
+        self._staging_slot = 0
+        self._staging_events: List[Optional[torch.cuda.Event]] = [None, None]
+        
     def add(self, experience: Dict[str, Any]):
         """Add experience to buffer"""
-        if len(self.buffer) < self.capacity:
-            self.buffer.append(experience)
-        else:
-            self.buffer[self.position] = experience
+        leaves = [(key, self._to_numpy(value)) for key, value in self._flatten(experience)]
+        if not self.columns:
+            self._allocate(leaves)
+        
+        for key, value in leaves:
+            if key not in self.columns:
+                raise KeyError(f"Experience key {'.'.join(key)} was not in the first experience")
+            self.columns[key][self.position] = value
             
         self.position = (self.position + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
         
-    def sample(self, batch_size: int) -> List[Dict[str, Any]]:
-        """Sample a batch of experiences from buffer"""
-        if len(self.buffer) < batch_size:
-            return self.buffer.copy()
+    def sample(self, batch_size: int, device: Optional[torch.device] = None) -> Dict[str, Any]:
+        """Sample a batch of experiences as nested dicts of (batch, ...) tensors"""
+        if self.size <= batch_size:
+            indices = np.arange(self.size)
         else:
-            return random.sample(self.buffer, batch_size)
+            indices = np.random.randint(0, self.size, size=batch_size)
+        return self._gather(indices, device)
+    
+    def _allocate(self, leaves: List[Tuple[Tuple[str, ...], np.ndarray]]):
+        """Create one column per leaf, shaped and typed like the first experience"""
+        for key, value in leaves:
+            # Python floats would otherwise become float64 columns
+            dtype = np.float32 if value.dtype == np.float64 else value.dtype
+            self.columns[key] = np.empty((self.capacity, *value.shape), dtype=dtype)
+    
+    def _gather(self, indices: np.ndarray, device: Optional[torch.device] = None) -> Dict[str, Any]:
+        """Slice every column at indices and rebuild the experience's nesting"""
+        pinned = device is not None and torch.device(device).type == 'cuda'
+        if pinned:
+            self._staging_slot ^= 1
+            # The slot was last used two batches ago; wait until its copies have been read
+            event = self._staging_events[self._staging_slot]
+            if event is not None:
+                event.synchronize()
+        
+        batch = {}
+        for key, column in self.columns.items():
+            node = batch
+            for name in key[:-1]:
+                node = node.setdefault(name, {})
+            if pinned:
+                # Gather straight into page-locked memory so the copy runs asynchronously
+                staging = self._pinned_staging(key, column, len(indices))
+                np.take(column, indices, axis=0, out=staging.numpy())
+                node[key[-1]] = staging.to(device, non_blocking=True)
+            else:
+                tensor = torch.from_numpy(column[indices])
+                node[key[-1]] = tensor if device is None else tensor.to(device)
+        
+        if pinned:
+            event = torch.cuda.Event()
+            event.record(torch.cuda.current_stream(device))
+            self._staging_events[self._staging_slot] = event
+        return batch
+    
+    def _pinned_staging(self, key: Tuple[str, ...], column: np.ndarray, batch_size: int) -> torch.Tensor:
+        """Current pinned staging slot for a column, (re)allocated when the batch size changes"""
+        buffers = self._staging.get(key)
+        if buffers is None or buffers[0].shape[0] != batch_size:
+            dtype = torch.from_numpy(column[:0]).dtype
+            buffers = self._staging[key] = [
+                torch.empty((batch_size, *column.shape[1:]), dtype=dtype, pin_memory=True) for _ in range(2)
+            ]
+        return buffers[self._staging_slot]
+    
+    @staticmethod
+    def _flatten(experience: Dict[str, Any], prefix: Tuple[str, ...] = ()):
+        """Yield (key path, value) for every non-dict value"""
+        for name, value in experience.items():
+            if isinstance(value, dict):
+                yield from ExperienceBuffer._flatten(value, prefix + (name,))
+            else:
+                yield prefix + (name,), value
+    
+    @staticmethod
+    def _to_numpy(value: Any) -> np.ndarray:
+        if isinstance(value, torch.Tensor):
+            return value.detach().cpu().numpy()
+        return np.asarray(value)
     
     def __len__(self):
-        return len(self.buffer)
+        return self.size
     
     def clear(self):
         """Clear buffer"""
-        self.buffer = []
+        # Columns are kept and overwritten by later adds
+        self.size = 0
         self.position = 0
 
 class PrioritizedExperienceBuffer(ExperienceBuffer):
-    """Prioritized experience replay buffer"""
+    """Prioritized experience replay buffer backed by a sum tree"""
     
     def __init__(self, capacity: int, alpha: float = 0.6, beta: float = 0.4):
         super().__init__(capacity)
         self.alpha = alpha
         self.beta = beta
-        self.priorities = np.zeros(capacity, dtype=np.float32)
         self.max_priority = 1.0
         
+        # Sum tree over priority ** alpha: slot i is leaf tree_capacity + i, node n has
+        # children 2n and 2n + 1, and the root (node 1) holds the total
+        self._depth = max(0, (capacity - 1).bit_length())
+        self._tree_capacity = 1 << self._depth
+        self.tree = np.zeros(2 * self._tree_capacity, dtype=np.float64)
+        
     def add(self, experience: Dict[str, Any]):
         """Add experience and set initial priority"""
+        slot = self.position
         super().add(experience)
-        self.priorities[self.position] = self.max_priority
+        self._update(np.array([slot]), self.max_priority ** self.alpha)
+        
+    def sample(self, batch_size: int, device: Optional[torch.device] = None
+               ) -> Tuple[Dict[str, Any], np.ndarray, np.ndarray]:
+        """Sample according to priority; returns (batch, buffer indices, importance weights)
         
-    def sample(self, batch_size: int) -> List[Dict[str, Any]]:
-        """Sample according to priority"""
-        if len(self.buffer) < batch_size:
-            indices = list(range(len(self.buffer)))
-            weights = np.ones(len(self.buffer), dtype=np.float32)
+        Pass the indices back to update_priorities once new TD errors are known.
+        """
+        if self.size <= batch_size:
+            indices = np.arange(self.size)
+            weights = np.ones(self.size, dtype=np.float32)
         else:
-            # Compute sampling probabilities
-            priorities = self.priorities[:len(self.buffer)]
-            probs = priorities ** self.alpha
-            probs /= probs.sum()
+            # Descend from the root towards the leaf whose prefix-sum range holds each target
+            total = self.tree[1]
+            targets = np.random.uniform(0.0, total, size=batch_size)
+            nodes = np.ones(batch_size, dtype=np.int64)
+            for _ in range(self._depth):
+                left = 2 * nodes
+                left_sums = self.tree[left]
+                # Never step into an empty right subtree on round-off
+                go_right = (targets >= left_sums) & (self.tree[left + 1] > 0)
+                targets = np.where(go_right, targets - left_sums, targets)
+                nodes = left + go_right
+            indices = nodes - self._tree_capacity
             
-            # Sample indices
-            indices = np.random.choice(len(self.buffer), batch_size, p=probs)
-            
-            # Compute importance-sampling weights
-            weights = (len(self.buffer) * probs[indices]) ** (-self.beta)
+            # Compute importance-sampling weights from the sampled leaves only
+            probs = self.tree[nodes] / total
+            weights = (self.size * probs) ** (-self.beta)
             weights /= weights.max()
             
-        samples = [self.buffer[i] for i in indices]
-        
-        # Attach weight info
-        for i, sample in enumerate(samples):
-            sample['weight'] = weights[i] if 'weights' in locals() else 1.0
-            
-        return samples
+        return self._gather(indices, device), indices, weights.astype(np.float32, copy=False)
     
     def update_priorities(self, indices: List[int], priorities: List[float]):
         """Update priorities for experiences"""
-        for idx, priority in zip(indices, priorities):
-            self.priorities[idx] = priority
-            self.max_priority = max(self.max_priority, priority)
\ No newline at end of file
+        priorities = np.asarray(priorities, dtype=np.float64)
+        if priorities.size == 0:
+            return
+        self._update(np.asarray(indices), priorities ** self.alpha)
+        self.max_priority = max(self.max_priority, float(priorities.max()))
+    
+    def _update(self, slots: np.ndarray, values):
+        """Write leaf values and recompute the sums on their paths to the root"""
+        nodes = slots + self._tree_capacity
+        self.tree[nodes] = values
+        for _ in range(self._depth):
+            nodes = np.unique(nodes // 2)
+            self.tree[nodes] = self.tree[2 * nodes] + self.tree[2 * nodes + 1]
+    
+    def clear(self):
+        """Clear buffer"""
+        super().clear()
+        self.tree.fill(0.0)
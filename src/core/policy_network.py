@@ -1,11 +1,24 @@
+"""
+Policy networks
+
+Conventions shared with value_network:
+- Without dropout, an nn.Identity takes the Dropout slot, so layer indices and
+  state_dict keys are the same either way.
+- Forwards add a batch dimension to 1-D inputs, which dynamically quantized
+  Linear layers require.
+- In the paper variants (*MLP), the paper's b_i are the only biases: W_i are
+  bias-free Linear layers, so each layer adds exactly one bias.
+"""
+
 import torch
 import torch.nn as nn
 import torch.nn.functional as F
+from typing import List
 
 class PolicyNetwork(nn.Module):
     """MLP policy network"""
     
-    def __init__(self, input_dim: int, hidden_dims: List[int], output_dim: int):
+    def __init__(self, input_dim: int, hidden_dims: List[int], output_dim: int, dropout: float = 0.1):
         super(PolicyNetwork, self).__init__()
         
         layers = []
@@ -16,7 +29,7 @@ class PolicyNetwork(nn.Module):
             layers.extend([
                 nn.Linear(prev_dim, hidden_dim),
                 nn.ReLU(),
-                nn.Dropout(0.1)
+                nn.Dropout(dropout) if dropout > 0 else nn.Identity()
             ])
             prev_dim = hidden_dim
             
@@ -27,8 +40,15 @@ class PolicyNetwork(nn.Module):
         self.network = nn.Sequential(*layers)
         
     def forward(self, x: torch.Tensor) -> torch.Tensor:
+        if x.dim() == 1:
+            return self.network(x.unsqueeze(0)).squeeze(0)
         return self.network(x)
     
+    def logits(self, x: torch.Tensor) -> torch.Tensor:
+        """Pre-softmax action scores, for log_softmax-based losses"""
+        # Every layer except the trailing Softmax
+        return self.network[:-1](x)
+    
     def get_action_probabilities(self, state: torch.Tensor) -> torch.Tensor:
         """Get action probability distribution"""
         return self.forward(state)
@@ -41,19 +61,26 @@ class PolicyNetworkMLP(nn.Module):
         super(PolicyNetworkMLP, self).__init__()
         
         # According to equations (11)-(14) in the paper
-        self.W1 = nn.Linear(input_dim, hidden1_dim)
+        self.W1 = nn.Linear(input_dim, hidden1_dim, bias=False)
         self.b1 = nn.Parameter(torch.randn(hidden1_dim))
-        self.W2 = nn.Linear(hidden1_dim, hidden2_dim)
+        self.W2 = nn.Linear(hidden1_dim, hidden2_dim, bias=False)
         self.b2 = nn.Parameter(torch.randn(hidden2_dim))
-        self.W3 = nn.Linear(hidden2_dim, output_dim)
+        self.W3 = nn.Linear(hidden2_dim, output_dim, bias=False)
         self.b3 = nn.Parameter(torch.randn(output_dim))
         
+    @classmethod
+    def scripted(cls, *args, **kwargs) -> torch.jit.ScriptModule:
+        """Build the network compiled with TorchScript, so forward runs without Python op dispatch"""
+        return torch.jit.script(cls(*args, **kwargs))
+    
     def forward(self, x: torch.Tensor) -> torch.Tensor:
+        return F.softmax(self.logits(x), dim=-1)
+    
+    def logits(self, x: torch.Tensor) -> torch.Tensor:
+        """Pre-softmax action scores O, for log_softmax-based losses"""
         # H^(1) = ReLU(XW_1 + b_1)
-        h1 = F.relu(self.W1(x) + self.b1)
+        h1 = F.linear(x, self.W1.weight, self.b1).relu_()
         # H^(2) = ReLU(H^(1)W_2 + b_2)
-        h2 = F.relu(self.W2(h1) + self.b2)
+        h2 = F.linear(h1, self.W2.weight, self.b2).relu_()
         # O = H^(2)W_3 + b_3
-        output = self.W3(h2) + self.b3
-        
-        return F.softmax(output, dim=-1)
\ No newline at end of file
+        return F.linear(h2, self.W3.weight, self.b3)
\ No newline at end of file
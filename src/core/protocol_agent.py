@@ -1,7 +1,8 @@
 import torch
 import torch.nn as nn
+import torch.nn.functional as F
 import numpy as np
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 from .policy_network import PolicyNetwork
 from .value_network import ValueNetwork
 
@@ -14,44 +15,36 @@ class ProtocolAgent:
         self.policy_network = policy_network
         self.value_network = value_network
         self.mutation_actions = mutation_actions
-        self.optimizer = torch.optim.Adam(
-            self.policy_network.parameters(), 
-            lr=0.01
-        )
+        
+        # Sampling and advantage estimation run without dropout; only the policy
+        # loss switches the policy back to train mode
+        self.policy_network.eval()
+        self.value_network.eval()
         
     def select_action(self, observation: torch.Tensor) -> torch.Tensor:
         """Select action based on current observation"""
         with torch.no_grad():
             action_probs = self.policy_network(observation)
-            action_dist = torch.distributions.Categorical(action_probs)
-            action = action_dist.sample()
+            # Same draw as Categorical(action_probs).sample(), as a single traceable op
+            action = torch.multinomial(action_probs, 1).squeeze(-1)
             
         return action
     
-    def update_policy(self, experiences: List[Dict], global_reward: float):
-        """Update policy network using experiences"""
-        if not experiences:
-            return
-            
-        # Compute policy gradient
-        policy_loss = 0
-        for exp in experiences:
-            obs = exp['observations'][self.field_name]
-            action = exp['actions'][self.field_name]
-            value = self.value_network(
-                exp['global_observation'], 
-                exp['global_actions']
-            )
-            
-            # Compute advantage
-            advantage = global_reward - value
-            
-            # Compute policy loss
-            action_probs = self.policy_network(obs)
-            log_prob = torch.log(action_probs[action])
-            policy_loss += -log_prob * advantage
+    def policy_loss(self, batch: Dict[str, Any], advantages: torch.Tensor) -> Optional[torch.Tensor]:
+        """Policy-gradient loss over a batch of experiences (one row per experience)
+        
+        advantages come from the shared critic, computed once per batch by the owning
+        AgentArray, which sums these losses and steps one shared optimizer.
+        """
+        observations = batch['observations'][self.field_name]
+        if len(observations) == 0:
+            return None
             
-        # Backpropagation
-        self.optimizer.zero_grad()
-        policy_loss.backward()
-        self.optimizer.step()
\ No newline at end of file
+        # Compute policy loss over all experiences at once
+        actions = batch['actions'][self.field_name].long()
+        # log_softmax on logits: one fused, stable kernel instead of log(softmax(...))
+        self.policy_network.train()
+        log_probs = F.log_softmax(self.policy_network.logits(observations), dim=-1)
+        self.policy_network.eval()
+        log_probs = log_probs.gather(-1, actions.unsqueeze(-1)).squeeze(-1)
+        return -(log_probs * advantages).sum()
\ No newline at end of file
@@ -1,12 +1,17 @@
+"""
+Value networks (layer conventions as described in policy_network)
+"""
+
 import torch
 import torch.nn as nn
 import torch.nn.functional as F
+from typing import List
 
 class ValueNetwork(nn.Module):
     """Shared value network"""
     
     def __init__(self, state_dim: int, action_dim: int, 
-                 hidden_dims: List[int] = [128, 64]):
+                 hidden_dims: List[int] = [128, 64], dropout: float = 0.1):
         super(ValueNetwork, self).__init__()
         
         self.state_dim = state_dim
@@ -21,7 +26,7 @@ class ValueNetwork(nn.Module):
             layers.extend([
                 nn.Linear(prev_dim, hidden_dim),
                 nn.ReLU(),
-                nn.Dropout(0.1)
+                nn.Dropout(dropout) if dropout > 0 else nn.Identity()
             ])
             prev_dim = hidden_dim
             
@@ -33,6 +38,8 @@ class ValueNetwork(nn.Module):
     def forward(self, state: torch.Tensor, actions: torch.Tensor) -> torch.Tensor:
         # Concatenate state and actions
         x = torch.cat([state, actions], dim=-1)
+        if x.dim() == 1:
+            return self.network(x.unsqueeze(0)).squeeze(0)
         return self.network(x)
 
 class ValueNetworkMLP(nn.Module):
@@ -43,22 +50,27 @@ class ValueNetworkMLP(nn.Module):
         super(ValueNetworkMLP, self).__init__()
         
         # Expand input dimensions per paper description
-        self.W1 = nn.Linear(input_dim, hidden1_dim)
+        self.W1 = nn.Linear(input_dim, hidden1_dim, bias=False)
         self.b1 = nn.Parameter(torch.randn(hidden1_dim))
-        self.W2 = nn.Linear(hidden1_dim, hidden2_dim)
+        self.W2 = nn.Linear(hidden1_dim, hidden2_dim, bias=False)
         self.b2 = nn.Parameter(torch.randn(hidden2_dim))
-        self.W3 = nn.Linear(hidden2_dim, output_dim)
+        self.W3 = nn.Linear(hidden2_dim, output_dim, bias=False)
         self.b3 = nn.Parameter(torch.randn(output_dim))
         
+    @classmethod
+    def scripted(cls, *args, **kwargs) -> torch.jit.ScriptModule:
+        """Build the network compiled with TorchScript, so forward runs without Python op dispatch"""
+        return torch.jit.script(cls(*args, **kwargs))
+    
     def forward(self, global_obs: torch.Tensor, global_actions: torch.Tensor) -> torch.Tensor:
         # Concatenate global observation and actions
         x = torch.cat([global_obs, global_actions], dim=-1)
         
         # H^(1) = ReLU(XW_1 + b_1)
-        h1 = F.relu(self.W1(x) + self.b1)
+        h1 = F.linear(x, self.W1.weight, self.b1).relu_()
         # H^(2) = ReLU(H^(1)W_2 + b_2)
-        h2 = F.relu(self.W2(h1) + self.b2)
+        h2 = F.linear(h1, self.W2.weight, self.b2).relu_()
         # V = H^(2)W_3 + b_3
-        value = self.W3(h2) + self.b3
+        value = F.linear(h2, self.W3.weight, self.b3)
         
         return value
\ No newline at end of file
@@ -6,10 +6,13 @@ Includes environment, protocol parser, device interface components
 
 from .power_iot_env import PowerIoTEnvironment
 from .protocol_parser import ProtocolParser
-from .device_interface import DeviceInterface
+from .device_interface import DeviceInterface, AsyncDeviceInterface
+from .prefetching_env import PrefetchingEnv
 
 __all__ = [
     'PowerIoTEnvironment',
     'ProtocolParser',
-    'DeviceInterface'
+    'DeviceInterface',
+    'AsyncDeviceInterface',
+    'PrefetchingEnv'
 ]
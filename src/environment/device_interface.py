@@ -1,13 +1,71 @@
+import asyncio
 import socket
 import time
 import logging
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 import subprocess
-import select
+from types import MappingProxyType
+import numpy as np
+
+# Protocol -> (offset, dtype, mask) of the header field whose masked bits flag an error:
+# Modbus TCP exception responses set the function code's high bit, and EtherNet/IP
+# reports a non-zero status. Both the single-response check and classify_batch read it.
+_ERROR_FIELDS = {
+    'modbus_tcp': (7, np.dtype(np.uint8), 0x80),
+    'ethernet_ip': (8, np.dtype('>u4'), 0xFFFFFFFF),
+}
+
+# Protocol -> minimum length of a valid response (basic header length); any non-empty otherwise
+_MIN_VALID_LENGTHS = {
+    'modbus_tcp': 8,
+    'ethernet_ip': 24,
+    'siemens_s7': 12,
+}
+
+# Fixed fields of each vulnerability report, built once; detectors add the per-message samples
+_TIMEOUT_VULNERABILITY = MappingProxyType({
+    'type': 'denial_of_service',
+    'severity': 'major',
+    'description': 'Message caused device response timeout'
+})
+_NO_RESPONSE_VULNERABILITY = MappingProxyType({
+    'type': 'service_disruption',
+    'severity': 'critical',
+    'description': 'Message caused device to stop responding'
+})
+_ERROR_RESPONSE_VULNERABILITY = MappingProxyType({
+    'type': 'protocol_error',
+    'severity': 'minor',
+    'description': 'Message triggered protocol error response'
+})
+_SLOW_RESPONSE_VULNERABILITY = MappingProxyType({
+    'type': 'performance_degradation',
+    'severity': 'minor'
+})
+_EXCEPTION_VULNERABILITY = MappingProxyType({
+    'type': 'exception_triggered',
+    'severity': 'major'
+})
+
+def _hex_prefix(data: bytes, max_chars: int = 50) -> str:
+    """data.hex()[:max_chars] without hex-encoding the rest of data"""
+    # Slicing the memoryview copies nothing; only the sampled prefix is encoded
+    return memoryview(data)[:max_chars // 2].hex()
+
+def _tune_socket(sock: socket.socket):
+    """Disable Nagle (probes are header-sized) and keep the idle connection alive"""
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+    if hasattr(socket, 'TCP_QUICKACK'):
+        # Linux only: acknowledge responses immediately instead of delaying the ACK
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_QUICKACK, 1)
 
 class DeviceInterface:
     """Power Internet of Things Device Interface"""
     
+    # Status names for the codes classify_batch returns
+    RESPONSE_STATUSES = ('empty_response', 'error_response', 'valid_response', 'unexpected_response')
+    
     def __init__(self, protocol: str, config: Dict[str, Any]):
         self.protocol = protocol
         self.config = config
@@ -22,10 +80,23 @@ class DeviceInterface:
         self.target_ip = config.get('target_ip', '127.0.0.1')
         self.socket = None
         
+        # Reused by every recv_into instead of allocating a bytes object per chunk
+        self._recv_view = memoryview(bytearray(65536))
+        # Once a response has started, a gap this long (not a full second) ends it
+        self._drain_timeout = config.get('recv_drain_ms', 10) / 1000.0
+        
+        # Response classifiers for this protocol
+        # Protocols without an error field get a zero mask, so they never report an error
+        error_offset, error_dtype, self._error_mask = _ERROR_FIELDS.get(protocol, (0, np.dtype(np.uint8), 0))
+        self._error_offset = error_offset
+        self._error_end = error_offset + error_dtype.itemsize
+        self._min_valid_length = _MIN_VALID_LENGTHS.get(protocol, 1)
+        
     def connect(self) -> bool:
         """Connect to the target device"""
         try:
             self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            _tune_socket(self.socket)
             self.socket.settimeout(self.timeout)
             self.socket.connect((self.target_ip, self.port))
             self.logger.info(f"Successfully connected to {self.target_ip}:{self.port}")
@@ -49,7 +120,14 @@ class DeviceInterface:
         try:
             # Send message
             start_time = time.time()
-            self.socket.send(message)
+            try:
+                self.socket.send(message)
+            except (BrokenPipeError, ConnectionResetError):
+                # The device dropped the kept-alive connection; reconnect once and resend
+                self.disconnect()
+                if not self.connect():
+                    return {'error': 'Connection failed', 'status': 'connection_error'}
+                self.socket.send(message)
             self.logger.debug(f"Sent {len(message)} bytes to device")
             
             response_data = None
@@ -80,29 +158,59 @@ class DeviceInterface:
     
     def _receive_response(self) -> bytes:
         """Receive device response"""
-        response = b''
-        self.socket.settimeout(2.0)  # Set shorter timeout for chunked reception
+        # bytearray extends in amortized O(1); bytes += chunk copied everything received so far
+        response = bytearray()
+        recv_view = self._recv_view
+        sock = self.socket
+        # The first chunk gets up to 1 s, as before; after it only the short drain
+        # timeout, so a complete response no longer waits out a full second of silence
+        sock.settimeout(1.0)
         
         try:
-            while True:
-                ready = select.select([self.socket], [], [], 1.0)
-                if ready[0]:
-                    chunk = self.socket.recv(4096)
-                    if not chunk:
-                        break
-                    response += chunk
-                else:
-                    # No more data
-                    break
+            received = sock.recv_into(recv_view)
+            sock.settimeout(self._drain_timeout)
+            while received:
+                response += recv_view[:received]
+                received = sock.recv_into(recv_view)
         except socket.timeout:
-            # Timeout on receive, return received data
+            # No more data; return what was received
             pass
+        finally:
+            sock.settimeout(self.timeout)
+        
+        return bytes(response)
+    
+    def classify_batch(self, responses: List[bytes]) -> np.ndarray:
+        """Classify many responses at once; returns one RESPONSE_STATUSES index (uint8) per response"""
+        lengths = np.fromiter(map(len, responses), dtype=np.int64, count=len(responses))
+        codes = np.where(lengths >= self._min_valid_length, 2, 3).astype(np.uint8)
+        
+        error_field = _ERROR_FIELDS.get(self.protocol)
+        if error_field is not None:
+            offset, dtype, mask = error_field
+            end = offset + dtype.itemsize
+            # Only responses long enough to carry the field can be errors
+            candidates = np.flatnonzero(lengths >= end)
+            if len(candidates):
+                fields = np.frombuffer(b''.join(responses[i][offset:end] for i in candidates), dtype=dtype)
+                codes[candidates[(fields & mask) != 0]] = 1
         
-        return response
+        codes[lengths == 0] = 0
+        return codes
+    
+    def _classify_response(self, response: bytes) -> str:
+        """Status of a single non-None response, as classify_batch would report it"""
+        if len(response) == 0:
+            return 'empty_response'
+        if self._is_error_response(response):
+            return 'error_response'
+        if self._is_valid_response(response):
+            return 'valid_response'
+        return 'unexpected_response'
     
     def _analyze_response(self, request: bytes, response: Optional[bytes], 
-                         execution_time: float) -> Dict[str, Any]:
-        """Analyze device response"""
+                         execution_time: float, status: Optional[str] = None) -> Dict[str, Any]:
+        """Analyze device response; status skips classification when classify_batch already did it"""
         analysis = {
             'request_length': len(request),
             'execution_time': execution_time,
@@ -114,18 +222,12 @@ class DeviceInterface:
             analysis['vulnerability'] = self._detect_no_response_vulnerability(request)
         else:
             analysis['response_length'] = len(response)
-            analysis['response_hex'] = response.hex()[:100]  # Record first 100 characters in hex
+            analysis['response_hex'] = _hex_prefix(response, 100)  # Record first 100 characters in hex
             
             # Determine status based on response content
-            if len(response) == 0:
-                analysis['status'] = 'empty_response'
-            elif self._is_error_response(response):
-                analysis['status'] = 'error_response'
+            analysis['status'] = status or self._classify_response(response)
+            if analysis['status'] == 'error_response':
                 analysis['vulnerability'] = self._detect_error_response_vulnerability(request, response)
-            elif self._is_valid_response(response):
-                analysis['status'] = 'valid_response'
-            else:
-                analysis['status'] = 'unexpected_response'
         
         # Detect abnormal execution time
         if execution_time > self.config.get('max_normal_execution_time', 10.0):
@@ -136,79 +238,159 @@ class DeviceInterface:
     
     def _is_error_response(self, response: bytes) -> bool:
         """Determine if response is an error response"""
-        # Protocol-specific error detection logic
-        if self.protocol == 'modbus_tcp' and len(response) >= 8:
-            # Modbus TCP exception response: highest bit of function code is 1
-            function_code = response[7] if len(response) > 7 else 0
-            return (function_code & 0x80) != 0
-            
-        elif self.protocol == 'ethernet_ip' and len(response) >= 12:
-            # EtherNet/IP non-zero status field indicates error
-            status = int.from_bytes(response[8:12], 'big')
-            return status != 0
-            
-        return False
+        # One masked big-endian read for every protocol instead of a per-protocol function
+        return (len(response) >= self._error_end and
+                int.from_bytes(response[self._error_offset:self._error_end], 'big') & self._error_mask != 0)
     
     def _is_valid_response(self, response: bytes) -> bool:
         """Determine if response is valid"""
-        # Basic validation: response is not empty and has reasonable length
-        if len(response) == 0:
-            return False
-            
-        # Protocol-specific valid response detection
-        if self.protocol == 'modbus_tcp':
-            return len(response) >= 8  # Modbus TCP header length
-            
-        elif self.protocol == 'ethernet_ip':
-            return len(response) >= 24  # EtherNet/IP basic header length
-            
-        elif self.protocol == 'siemens_s7':
-            return len(response) >= 12  # S7 basic header length
-            
-        return True
+        # Non-empty and at least the protocol's basic header length
+        return len(response) >= self._min_valid_length
     
     def _detect_timeout_vulnerability(self, request: bytes) -> Dict[str, Any]:
         """Detect timeout-related vulnerabilities"""
-        return {
-            'type': 'denial_of_service',
-            'severity': 'major',
-            'description': 'Message caused device response timeout',
-            'request_sample': request.hex()[:50]
-        }
+        return {**_TIMEOUT_VULNERABILITY, 'request_sample': _hex_prefix(request)}
     
     def _detect_no_response_vulnerability(self, request: bytes) -> Dict[str, Any]:
         """Detect no-response-related vulnerabilities"""
-        return {
-            'type': 'service_disruption', 
-            'severity': 'critical',
-            'description': 'Message caused device to stop responding',
-            'request_sample': request.hex()[:50]
-        }
+        return {**_NO_RESPONSE_VULNERABILITY, 'request_sample': _hex_prefix(request)}
     
     def _detect_error_response_vulnerability(self, request: bytes, response: bytes) -> Dict[str, Any]:
         """Detect error response-related vulnerabilities"""
         return {
-            'type': 'protocol_error',
-            'severity': 'minor',
-            'description': 'Message triggered protocol error response',
-            'request_sample': request.hex()[:50],
-            'response_sample': response.hex()[:50]
+            **_ERROR_RESPONSE_VULNERABILITY,
+            'request_sample': _hex_prefix(request),
+            'response_sample': _hex_prefix(response)
         }
     
     def _detect_slow_response_vulnerability(self, request: bytes, execution_time: float) -> Dict[str, Any]:
         """Detect slow response-related vulnerabilities"""
         return {
-            'type': 'performance_degradation',
-            'severity': 'minor', 
+            **_SLOW_RESPONSE_VULNERABILITY,
             'description': f'Message caused slow device response ({execution_time:.2f}s)',
-            'request_sample': request.hex()[:50]
+            'request_sample': _hex_prefix(request)
         }
     
     def _detect_exception_vulnerability(self, request: bytes, error: str) -> Dict[str, Any]:
         """Detect exception-related vulnerabilities"""
         return {
-            'type': 'exception_triggered',
-            'severity': 'major',
+            **_EXCEPTION_VULNERABILITY,
             'description': f'Message caused device exception: {error}',
-            'request_sample': request.hex()[:50]
+            'request_sample': _hex_prefix(request)
         }
+
+class AsyncDeviceInterface(DeviceInterface):
+    """Device interface on asyncio streams, so probes to several devices can be in flight at once"""
+    
+    def __init__(self, protocol: str, config: Dict[str, Any]):
+        super().__init__(protocol, config)
+        self.reader = None
+        self.writer = None
+        
+    async def connect(self) -> bool:
+        """Connect to the target device"""
+        try:
+            self.reader, self.writer = await asyncio.wait_for(
+                asyncio.open_connection(self.target_ip, self.port), timeout=self.timeout
+            )
+            _tune_socket(self.writer.get_extra_info('socket'))
+            self.logger.info(f"Successfully connected to {self.target_ip}:{self.port}")
+            return True
+        except Exception as e:
+            self.logger.error(f"Connection failed: {e}")
+            return False
+    
+    async def disconnect(self):
+        """Disconnect from the device"""
+        if self.writer:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except Exception:
+                pass
+            self.reader = None
+            self.writer = None
+    
+    async def send_message(self, message: bytes, wait_response: bool = True) -> Dict[str, Any]:
+        """Send message to device and get response"""
+        exchange = await self._exchange(message, wait_response)
+        if isinstance(exchange, dict):
+            return exchange
+        response_data, execution_time = exchange
+        
+        # Analyze response
+        return self._analyze_response(message, response_data, execution_time)
+    
+    async def send_messages(self, messages: List[bytes]) -> List[Dict[str, Any]]:
+        """Send messages one after another, then classify all responses in one classify_batch call"""
+        results = [await self._exchange(message) for message in messages]
+        answered = [i for i, result in enumerate(results) if not isinstance(result, dict)]
+        if answered:
+            codes = self.classify_batch([results[i][0] for i in answered])
+            for i, code in zip(answered, codes.tolist()):
+                response_data, execution_time = results[i]
+                results[i] = self._analyze_response(messages[i], response_data, execution_time,
+                                                    status=self.RESPONSE_STATUSES[code])
+        return results
+    
+    async def _exchange(self, message: bytes, wait_response: bool = True):
+        """Send one message; returns (response, execution_time), or a result dict when sending failed"""
+        if not self.writer:
+            if not await self.connect():
+                return {'error': 'Connection failed', 'status': 'connection_error'}
+        
+        try:
+            # Send message
+            start_time = time.time()
+            try:
+                self.writer.write(message)
+                await asyncio.wait_for(self.writer.drain(), timeout=self.timeout)
+            except (BrokenPipeError, ConnectionResetError):
+                # The device dropped the kept-alive connection; reconnect once and resend
+                await self.disconnect()
+                if not await self.connect():
+                    return {'error': 'Connection failed', 'status': 'connection_error'}
+                self.writer.write(message)
+                await asyncio.wait_for(self.writer.drain(), timeout=self.timeout)
+            self.logger.debug(f"Sent {len(message)} bytes to device")
+            
+            response_data = None
+            if wait_response:
+                # Wait for response
+                response_data = await self._receive_response()
+            
+            return response_data, time.time() - start_time
+            
+        except asyncio.TimeoutError:
+            self.logger.warning("Device response timed out")
+            return {
+                'status': 'timeout',
+                'execution_time': self.timeout,
+                'vulnerability': self._detect_timeout_vulnerability(message)
+            }
+        except Exception as e:
+            self.logger.error(f"Error sending message: {e}")
+            return {
+                'status': 'error',
+                'error': str(e),
+                'vulnerability': self._detect_exception_vulnerability(message, str(e))
+            }
+    
+    async def _receive_response(self) -> bytes:
+        """Receive device response"""
+        response = bytearray()
+        
+        # Same framing as the blocking interface: up to 1 s for the first chunk, then the
+        # short drain timeout; waiting here yields to other devices' probes
+        timeout = 1.0
+        while True:
+            try:
+                chunk = await asyncio.wait_for(self.reader.read(len(self._recv_view)), timeout=timeout)
+            except asyncio.TimeoutError:
+                break
+            if not chunk:
+                break
+            response += chunk
+            timeout = self._drain_timeout
+        
+        return bytes(response)
@@ -1,8 +1,11 @@
+import asyncio
 import torch
 import numpy as np
 from typing import Dict, List, Any, Tuple
 import logging
 
+from .device_interface import AsyncDeviceInterface
+
 class PowerIoTEnvironment:
     """Power IoT environment"""
     
@@ -14,14 +17,25 @@ class PowerIoTEnvironment:
         # Protocol parsers
         self.protocol_parsers = self._initialize_parsers()
         
-        # Device interfaces
+        # Device interfaces; their streams live on this loop, which every step reuses
+        self._loop = asyncio.new_event_loop()
         self.device_interfaces = self._initialize_interfaces()
         
         # State tracking
         self.current_state = {}
+        # Numeric state lives in two (protocols, features) arrays used alternately; observations
+        # are zero-copy views of one, so those handed out by the previous step stay intact
+        # while the next step writes the other
+        self._protocol_rows = {protocol: row for row, protocol in enumerate(protocols)}
+        self._state_arrays = np.zeros((2, len(protocols), 3), dtype=np.float32)
+        self._state_views = torch.from_numpy(self._state_arrays)
+        self._state_slot = 0
         self.execution_depth = {}
         self.vulnerabilities_found = []
         
+        # Protocol -> template message, built on first use and reused every step
+        self._template_cache: Dict[str, bytes] = {}
+        
     def _initialize_parsers(self) -> Dict[str, Any]:
         """Initialize protocol parsers"""
         parsers = {}
@@ -35,7 +49,7 @@ class PowerIoTEnvironment:
         interfaces = {}
         for protocol in self.protocols:
             # Initialize corresponding device interface based on protocol type
-            interfaces[protocol] = DeviceInterface(protocol, self.config)
+            interfaces[protocol] = AsyncDeviceInterface(protocol, self.config)
         return interfaces
     
     def reset(self) -> Dict[str, torch.Tensor]:
@@ -46,15 +60,20 @@ class PowerIoTEnvironment:
         
         # Initialize state for each protocol
         initial_observations = {}
+        # Fresh state goes into the other array, like a step's update
+        self._state_slot ^= 1
         for protocol in self.protocols:
             protocol_state = self._get_initial_protocol_state(protocol)
             self.current_state[protocol] = protocol_state
-            initial_observations[protocol] = self._state_to_observation(protocol_state)
+            initial_observations[protocol] = self._state_to_observation(protocol, protocol_state)
             
         return initial_observations
     
-    def step(self, actions: Dict[str, Dict[str, torch.Tensor]]) -> Tuple[Dict, float, bool, Dict]:
-        """Execute one environment step"""
+    def step(self, actions: Dict[str, Any]) -> Tuple[Dict, float, bool, Dict]:
+        """Execute one environment step
+        
+        Per-protocol actions may be a field->action dict or a (num_agents,) tensor.
+        """
         
         # Apply mutations
         mutated_messages = self._apply_mutations(actions)
@@ -80,14 +99,23 @@ class PowerIoTEnvironment:
         
         return new_observations, reward, done, info
     
-    def _apply_mutations(self, actions: Dict[str, Dict[str, torch.Tensor]]) -> Dict[str, List[bytes]]:
+    def _apply_mutations(self, actions: Dict[str, Any]) -> Dict[str, List[bytes]]:
         """Apply mutations to generate test cases"""
         mutated_messages = {}
         
         for protocol, field_actions in actions.items():
             if protocol in self.protocol_parsers:
                 parser = self.protocol_parsers[protocol]
-                original_message = self._get_protocol_template(protocol)
+                
+                if isinstance(field_actions, torch.Tensor):
+                    # (num_agents,) action tensor ordered like the protocol's field config;
+                    # a single .tolist() is the only device sync for the step
+                    field_order = list(self.config['protocols'][protocol]['fields'])
+                    field_actions = dict(zip(field_order, field_actions.tolist()))
+                
+                original_message = self._template_cache.get(protocol)
+                if original_message is None:
+                    original_message = self._template_cache[protocol] = self._get_protocol_template(protocol)
                 
                 # Apply mutations
                 mutated_message = parser.mutate_message(original_message, field_actions)
@@ -96,37 +124,58 @@ class PowerIoTEnvironment:
         return mutated_messages
     
     def _send_test_cases(self, test_cases: Dict[str, List[bytes]]) -> Dict[str, Any]:
-        """Send test cases to target devices and collect results"""
-        results = {}
+        """Send test cases to target devices and collect results
         
-        for protocol, messages in test_cases.items():
-            if protocol in self.device_interfaces:
-                interface = self.device_interfaces[protocol]
-                protocol_results = []
-                
-                for message in messages:
-                    try:
-                        # Send message and get response
-                        response = interface.send_message(message)
-                        
-                        # Analyze response
-                        analysis = self._analyze_response(protocol, message, response)
-                        protocol_results.append(analysis)
-                        
-                    except Exception as e:
-                        # Record exception (potential vulnerability)
-                        vulnerability = self._detect_vulnerability(protocol, message, str(e))
-                        if vulnerability:
-                            self.vulnerabilities_found.append(vulnerability)
-                        protocol_results.append({
-                            'status': 'error',
-                            'exception': str(e),
-                            'vulnerability': vulnerability
-                        })
-                
-                results[protocol] = protocol_results
+        Protocols are probed concurrently; each protocol's messages still go out
+        one at a time on its own connection.
+        """
+        return self._loop.run_until_complete(self._send_test_cases_async(test_cases))
+    
+    async def _send_test_cases_async(self, test_cases: Dict[str, List[bytes]]) -> Dict[str, Any]:
+        """Run every protocol's probes on the event loop and gather their results"""
+        protocols = [protocol for protocol in test_cases if protocol in self.device_interfaces]
+        protocol_results = await asyncio.gather(
+            *(self._send_protocol_messages(protocol, test_cases[protocol]) for protocol in protocols)
+        )
+        return dict(zip(protocols, protocol_results))
+    
+    async def _send_protocol_messages(self, protocol: str, messages: List[bytes]) -> List[Dict[str, Any]]:
+        """Send one protocol's messages in order and analyze each response"""
+        interface = self.device_interfaces[protocol]
+        protocol_results = []
+        
+        # Responses come back already classified, in one vectorized pass per protocol
+        responses = await interface.send_messages(messages)
+        
+        for message, response in zip(messages, responses):
+            try:
+                # Analyze response
+                analysis = self._analyze_response(protocol, message, response)
+                protocol_results.append(analysis)
                 
-        return results
+            except Exception as e:
+                # Record exception (potential vulnerability)
+                vulnerability = self._detect_vulnerability(protocol, message, str(e))
+                if vulnerability:
+                    self.vulnerabilities_found.append(vulnerability)
+                protocol_results.append({
+                    'status': 'error',
+                    'exception': str(e),
+                    'vulnerability': vulnerability
+                })
+        
+        return protocol_results
+    
+    def close(self):
+        """Close device connections and the event loop"""
+        if self._loop.is_closed():
+            return
+        self._loop.run_until_complete(self._disconnect_all())
+        self._loop.close()
+    
+    async def _disconnect_all(self):
+        """Disconnect every device interface (gather must be created inside the loop)"""
+        await asyncio.gather(*(interface.disconnect() for interface in self.device_interfaces.values()))
     
     def _calculate_reward(self, fuzzing_results: Dict[str, Any]) -> float:
         """Compute reward value"""
@@ -152,12 +201,17 @@ class PowerIoTEnvironment:
         """Update environment state"""
         new_observations = {}
         
+        # Write the other state array, carrying over protocols this step did not touch
+        previous = self._state_slot
+        self._state_slot ^= 1
+        self._state_arrays[self._state_slot] = self._state_arrays[previous]
+        
         for protocol in self.protocols:
             if protocol in fuzzing_results:
                 # Update protocol state
                 protocol_state = self._update_protocol_state(protocol, fuzzing_results[protocol])
                 self.current_state[protocol] = protocol_state
-                new_observations[protocol] = self._state_to_observation(protocol_state)
+                new_observations[protocol] = self._state_to_observation(protocol, protocol_state)
                 
         return new_observations
     
@@ -171,17 +225,20 @@ class PowerIoTEnvironment:
             'execution_path': []
         }
     
-    def _state_to_observation(self, state: Dict[str, Any]) -> torch.Tensor:
-        """Convert state to observation vector"""
-        # Convert state dict into numeric vector
-        features = [
+    def _state_to_observation(self, protocol: str, state: Dict[str, Any]) -> torch.Tensor:
+        """Convert state to observation vector
+        
+        The numeric features are written into the protocol's row of the current state
+        array; the returned tensor is a view of that row and stays valid for one more step.
+        """
+        row = self._protocol_rows[protocol]
+        self._state_arrays[self._state_slot, row] = (
             state['message_count'],
             state['vulnerability_count'],
             state['coverage'],
-            # Add more features if needed
-        ]
-        
-        return torch.tensor(features, dtype=torch.float32)
+            # Add more features if needed (and widen _state_arrays)
+        )
+        return self._state_views[self._state_slot, row]
     
     def _get_vulnerability_reward(self, severity: str) -> float:
         """Get reward by vulnerability severity"""
@@ -0,0 +1,42 @@
+import concurrent.futures
+from typing import Dict, Any, Tuple
+
+class PrefetchingEnv:
+    """Environment wrapper that runs steps on a worker thread
+    
+    step_async() returns immediately so the caller can overlap its own work
+    with the environment's protocol mutation and device I/O; get() collects
+    the result. Other attributes (reset, state) are delegated to the wrapped env.
+    """
+    
+    def __init__(self, env):
+        self._env = env
+        self._pool = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        self._future = None
+    
+    def step_async(self, actions: Dict[str, Any]):
+        """Submit one environment step without waiting for it"""
+        if self._future is not None:
+            raise RuntimeError("Previous step has not been collected with get()")
+        self._future = self._pool.submit(self._env.step, actions)
+    
+    def get(self) -> Tuple[Dict, float, bool, Dict]:
+        """Wait for the submitted step and return (observations, reward, done, info)"""
+        if self._future is None:
+            raise RuntimeError("No pending step; call step_async() first")
+        future, self._future = self._future, None
+        return future.result()
+    
+    def step(self, actions: Dict[str, Any]) -> Tuple[Dict, float, bool, Dict]:
+        """Synchronous step, for callers that have nothing to overlap"""
+        self.step_async(actions)
+        return self.get()
+    
+    def close(self, close_env: bool = True):
+        """Shut down the worker thread, then the wrapped env unless close_env is False (e.g. a cached env)"""
+        self._pool.shutdown(wait=True)
+        if close_env and hasattr(self._env, 'close'):
+            self._env.close()
+    
+    def __getattr__(self, name):
+        return getattr(self._env, name)
@@ -0,0 +1,34 @@
+"""
+Cached constructors for fuzzing components
+
+Repeated runs with the same protocol config reuse one MutationEngine or
+TestCaseGenerator instead of rebuilding seeds, strategy tables and JIT warm-up.
+"""
+
+import json
+from functools import lru_cache
+from typing import Dict, Any
+
+from .mutation_engine import MutationEngine
+from .test_case_generator import TestCaseGenerator
+
+def _config_key(config: Dict[str, Any]) -> str:
+    """Hashable, order-preserving key for a (nested) protocol config"""
+    # frozenset(config.items()) cannot hold the nested field dicts/lists
+    return json.dumps(config)
+
+@lru_cache(maxsize=16)
+def _cached_mutation_engine(config_key: str) -> MutationEngine:
+    return MutationEngine(json.loads(config_key))
+
+@lru_cache(maxsize=16)
+def _cached_test_case_generator(config_key: str) -> TestCaseGenerator:
+    return TestCaseGenerator(json.loads(config_key))
+
+def get_mutation_engine(protocol_config: Dict[str, Any]) -> MutationEngine:
+    """Get a shared MutationEngine for a protocol config"""
+    return _cached_mutation_engine(_config_key(protocol_config))
+
+def get_test_case_generator(protocol_configs: Dict[str, Any]) -> TestCaseGenerator:
+    """Get a shared TestCaseGenerator for a set of protocol configs"""
+    return _cached_test_case_generator(_config_key(protocol_configs))
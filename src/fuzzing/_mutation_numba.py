@@ -0,0 +1,57 @@
+"""
+Compiled byte-level kernels for the mutation engine
+
+Numba is optional; without it the kernels are plain Python functions and
+MutationEngine keeps to its vectorized NumPy paths instead. The kernels are
+not disk-cached: this package is imported both as `fuzzing` and `src.fuzzing`,
+and a cache written under one module name fails to load under the other.
+"""
+
+import numpy as np
+
+try:
+    from numba import njit
+    _NUMBA_AVAILABLE = True
+except ImportError:
+    _NUMBA_AVAILABLE = False
+    
+    def njit(*args, **kwargs):
+        """No-op stand-in for numba.njit"""
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+@njit
+def _flip(buf, start, end, draws, probability):
+    """XOR bytes in [start, end) with 0xFF where draws[i - start] < probability
+    
+    draws come from NumPy's generator: numba's own np.random stream is not
+    seeded by np.random.seed, so drawing in here would make flips unreproducible.
+    """
+    for i in range(start, end):
+        if draws[i - start] < probability:
+            buf[i] ^= 0xFF
+
+@njit
+def _del(buf, start, end):
+    """Zero-fill bytes in [start, end)"""
+    for i in range(start, end):
+        buf[i] = 0
+
+@njit
+def _dup(buf, start, end):
+    """Return a copy of buf with bytes [start, end) appended"""
+    n = buf.shape[0]
+    out = np.empty(n + end - start, dtype=np.uint8)
+    for i in range(n):
+        out[i] = buf[i]
+    for i in range(start, end):
+        out[n + i - start] = buf[i]
+    return out
+
+def warm_up():
+    """Trigger JIT compilation so the first real mutation is not penalized"""
+    buf = np.zeros(16, dtype=np.uint8)
+    _flip(buf, 0, 4, np.zeros(4), 0.3)
+    _del(buf, 4, 8)
+    _dup(buf, 8, 12)
@@ -1,19 +1,39 @@
 import hashlib
 import logging
-from typing import Dict, List, Set, Any
+from functools import cached_property
+import numpy as np
+from typing import Dict, List, Set, Any, Tuple
 from collections import defaultdict
 
+# AFL-style edge map: 64K one-byte hit counters indexed by (prev_loc >> 1) ^ cur_loc
+EDGE_MAP_SIZE = 1 << 16
+
+# Hit count -> AFL bucket bit (1, 2, 3, 4-7, 8-15, 16-31, 32-127, 128+)
+_COUNT_BUCKETS = np.zeros(256, dtype=np.uint8)
+for _low, _high, _bucket in ((1, 1, 1), (2, 2, 2), (3, 3, 4), (4, 7, 8), (8, 15, 16),
+                             (16, 31, 32), (32, 127, 64), (128, 255, 128)):
+    _COUNT_BUCKETS[_low:_high + 1] = _bucket
+
 class CoverageTracker:
     """Code Coverage Tracker"""
     
     def __init__(self):
         self.logger = logging.getLogger(__name__)
         
-        # Coverage data
-        self.basic_blocks_covered = set()
-        self.functions_covered = set()
+        # Coverage data: names are interned to dense IDs once and seen-state
+        # lives in packed bitmaps (bit i set == ID i covered)
+        self.basic_block_ids: Dict[str, int] = {}
+        self.function_ids: Dict[str, int] = {}
+        self.basic_block_bitmap = np.zeros(0, dtype=np.uint8)
+        self.function_bitmap = np.zeros(0, dtype=np.uint8)
+        self.covered_basic_blocks = 0
+        self.covered_functions = 0
         self.execution_paths = set()
         
+        # Saturating edge hit counters, and AFL "virgin" bits of bucketed counts not yet seen
+        self.edge_map = np.zeros(EDGE_MAP_SIZE, dtype=np.uint8)
+        self.virgin_map = np.full(EDGE_MAP_SIZE, 0xFF, dtype=np.uint8)
+        
         # Statistical information
         self.coverage_stats = {
             'total_basic_blocks': 0,
@@ -29,12 +49,17 @@ class CoverageTracker:
                         execution_sequence: List[str]) -> Dict[str, Any]:
         """Record execution information"""
         # Record basic blocks
-        new_blocks = set(basic_blocks) - self.basic_blocks_covered
-        self.basic_blocks_covered.update(basic_blocks)
+        block_ids = self._intern(basic_blocks, self.basic_block_ids)
+        self.basic_block_bitmap, new_blocks = self._merge_bitmap(self.basic_block_bitmap, block_ids)
+        self.covered_basic_blocks += new_blocks
         
         # Record functions
-        new_functions = set(functions) - self.functions_covered
-        self.functions_covered.update(functions)
+        function_ids = self._intern(functions, self.function_ids)
+        self.function_bitmap, new_functions = self._merge_bitmap(self.function_bitmap, function_ids)
+        self.covered_functions += new_functions
+        
+        # Record edges between consecutive basic blocks
+        new_edge_bits = self._record_edges(self._intern(execution_sequence, self.basic_block_ids))
         
         # Record execution path
         path_hash = self._hash_execution_path(execution_sequence)
@@ -46,16 +71,103 @@ class CoverageTracker:
         path_depth = self._calculate_path_depth(execution_sequence)
         
         # Update statistics
+        self._invalidate_summary()
         coverage_data = self._update_coverage_stats()
         coverage_data.update({
-            'new_blocks': len(new_blocks),
-            'new_functions': len(new_functions),
+            'new_blocks': new_blocks,
+            'new_functions': new_functions,
             'new_path': is_new_path,
+            'new_edge_bits': new_edge_bits,
             'path_depth': path_depth
         })
         
         return coverage_data
     
+    def record_execution_batch(self, executions: List[Dict[str, List[str]]]) -> Dict[str, Any]:
+        """Record a batch of executions (e.g. one episode) with one bitmap merge and one stats update
+        
+        Each execution is a dict with the record_execution arguments. Edges and
+        paths stay per execution; coverage_over_time gets one entry per batch.
+        """
+        # Blocks and functions of the whole batch are merged in one pass each
+        block_ids = self._intern([name for execution in executions for name in execution['basic_blocks']],
+                                 self.basic_block_ids)
+        self.basic_block_bitmap, new_blocks = self._merge_bitmap(self.basic_block_bitmap, block_ids)
+        self.covered_basic_blocks += new_blocks
+        
+        function_ids = self._intern([name for execution in executions for name in execution['functions']],
+                                    self.function_ids)
+        self.function_bitmap, new_functions = self._merge_bitmap(self.function_bitmap, function_ids)
+        self.covered_functions += new_functions
+        
+        # Edges must not join the end of one execution to the start of the next
+        new_edge_bits = 0
+        new_paths = 0
+        for execution in executions:
+            execution_sequence = execution['execution_sequence']
+            new_edge_bits += self._record_edges(self._intern(execution_sequence, self.basic_block_ids))
+            
+            path_hash = self._hash_execution_path(execution_sequence)
+            if path_hash not in self.execution_paths:
+                self.execution_paths.add(path_hash)
+                new_paths += 1
+            self._calculate_path_depth(execution_sequence)
+        
+        self._invalidate_summary()
+        coverage_data = self._update_coverage_stats()
+        coverage_data.update({
+            'new_blocks': new_blocks,
+            'new_functions': new_functions,
+            'new_paths': new_paths,
+            'new_edge_bits': new_edge_bits,
+            'executions': len(executions)
+        })
+        
+        return coverage_data
+    
+    @staticmethod
+    def _intern(names: List[str], interner: Dict[str, int]) -> np.ndarray:
+        """Map names to dense uint32 IDs, assigning new IDs on first sight"""
+        return np.fromiter((interner.setdefault(name, len(interner)) for name in names),
+                           dtype=np.uint32, count=len(names))
+    
+    @staticmethod
+    def _merge_bitmap(bitmap: np.ndarray, ids: np.ndarray) -> Tuple[np.ndarray, int]:
+        """OR IDs into a packed bitmap, returning the bitmap and newly set bit count"""
+        if ids.size == 0:
+            return bitmap, 0
+        
+        # Grow geometrically as the interner hands out new IDs
+        required = int(ids.max()) // 8 + 1
+        if required > bitmap.size:
+            grown = np.zeros(max(required, bitmap.size * 2), dtype=np.uint8)
+            grown[:bitmap.size] = bitmap
+            bitmap = grown
+        
+        new_mask = np.zeros_like(bitmap)
+        np.bitwise_or.at(new_mask, ids >> 3, (1 << (ids & 7)).astype(np.uint8))
+        new_bits = int(np.unpackbits(new_mask & ~bitmap).sum())
+        bitmap |= new_mask
+        
+        return bitmap, new_bits
+    
+    def _record_edges(self, block_ids: np.ndarray) -> int:
+        """Add one execution's edges to the edge map; returns how many new bucket bits it hit"""
+        if block_ids.size < 2:
+            return 0
+        
+        # Spread dense IDs over the map like AFL's random block locations
+        locations = (block_ids * np.uint32(2654435761)) >> np.uint32(16)
+        edges, counts = np.unique((locations[:-1] >> 1) ^ locations[1:], return_counts=True)
+        
+        self.edge_map[edges] = np.minimum(self.edge_map[edges].astype(np.int64) + counts, 255)
+        
+        # New coverage = bucketed hit counts whose bits are still virgin
+        buckets = _COUNT_BUCKETS[np.minimum(counts, 255)]
+        new_bits = buckets & self.virgin_map[edges]
+        self.virgin_map[edges] &= ~buckets
+        return int(np.count_nonzero(new_bits))
+    
     def _hash_execution_path(self, execution_sequence: List[str]) -> str:
         """Hash execution path for deduplication"""
         path_string = '->'.join(execution_sequence)
@@ -73,8 +185,8 @@ class CoverageTracker:
     
     def _update_coverage_stats(self) -> Dict[str, Any]:
         """Update coverage statistics"""
-        basic_block_coverage = len(self.basic_blocks_covered) / max(1, self.coverage_stats['total_basic_blocks'])
-        function_coverage = len(self.functions_covered) / max(1, self.coverage_stats['total_functions'])
+        basic_block_coverage = self.covered_basic_blocks / max(1, self.coverage_stats['total_basic_blocks'])
+        function_coverage = self.covered_functions / max(1, self.coverage_stats['total_functions'])
         path_coverage = len(self.execution_paths)
         
         coverage_data = {
@@ -82,8 +194,8 @@ class CoverageTracker:
             'function_coverage': function_coverage,
             'path_coverage': path_coverage,
             'total_paths': path_coverage,
-            'unique_basic_blocks': len(self.basic_blocks_covered),
-            'unique_functions': len(self.functions_covered)
+            'unique_basic_blocks': self.covered_basic_blocks,
+            'unique_functions': self.covered_functions
         }
         
         # Record coverage changes over time
@@ -92,25 +204,38 @@ class CoverageTracker:
         return coverage_data
     
     def get_coverage_summary(self) -> Dict[str, Any]:
-        """Get coverage summary"""
+        """Get coverage summary (built once per coverage change)"""
+        return self._coverage_summary
+    
+    def _invalidate_summary(self):
+        """Drop the cached summary after coverage or totals change"""
+        self.__dict__.pop('_coverage_summary', None)
+    
+    @cached_property
+    def _coverage_summary(self) -> Dict[str, Any]:
+        """Build the coverage summary in one pass"""
         if self.coverage_stats['total_basic_blocks'] == 0:
             return {'error': 'Total basic block count not set'}
         
         return {
             'basic_block_coverage': {
-                'covered': len(self.basic_blocks_covered),
+                'covered': self.covered_basic_blocks,
                 'total': self.coverage_stats['total_basic_blocks'],
-                'percentage': len(self.basic_blocks_covered) / self.coverage_stats['total_basic_blocks'] * 100
+                'percentage': self.covered_basic_blocks / self.coverage_stats['total_basic_blocks'] * 100
             },
             'function_coverage': {
-                'covered': len(self.functions_covered),
+                'covered': self.covered_functions,
                 'total': self.coverage_stats['total_functions'],
-                'percentage': len(self.functions_covered) / max(1, self.coverage_stats['total_functions']) * 100
+                'percentage': self.covered_functions / max(1, self.coverage_stats['total_functions']) * 100
             },
             'path_coverage': {
                 'unique_paths': len(self.execution_paths),
                 'path_depth_distribution': dict(self.path_depths)
             },
+            'edge_coverage': {
+                'covered_edges': int(np.count_nonzero(self.edge_map)),
+                'map_size': EDGE_MAP_SIZE
+            },
             'coverage_trend': self._calculate_coverage_trend()
         }
     
@@ -142,14 +267,21 @@ class CoverageTracker:
         """Set total counts for basic blocks and functions"""
         self.coverage_stats['total_basic_blocks'] = total_basic_blocks
         self.coverage_stats['total_functions'] = total_functions
+        self._invalidate_summary()
     
     def reset_coverage(self):
         """Reset coverage data"""
-        self.basic_blocks_covered.clear()
-        self.functions_covered.clear()
+        # Interned IDs stay valid across resets; only seen-state is cleared
+        self.basic_block_bitmap.fill(0)
+        self.function_bitmap.fill(0)
+        self.covered_basic_blocks = 0
+        self.covered_functions = 0
         self.execution_paths.clear()
+        self.edge_map.fill(0)
+        self.virgin_map.fill(0xFF)
         self.coverage_stats['coverage_over_time'].clear()
         self.path_depths.clear()
+        self._invalidate_summary()
 
 class LLVMCoverageTracker(CoverageTracker):
     """LLVM-based Coverage Tracker"""
@@ -1,8 +1,11 @@
 import random
 import struct
-from typing import List, Dict, Any, Union
+import numpy as np
+from typing import List, Dict, Any, Optional, Union
 from enum import Enum
 
+from ._mutation_numba import _NUMBA_AVAILABLE, _flip, _del, _dup, warm_up
+
 class MutationAction(Enum):
     """Mutation operation enumeration"""
     FIELD_FLIPPING = "field_flipping"
@@ -17,8 +20,10 @@ class MutationAction(Enum):
 class MutationEngine:
     """Protocol field mutation engine"""
     
-    def __init__(self, protocol_config: Dict[str, Any]):
+    def __init__(self, protocol_config: Dict[str, Any], max_message_len: Optional[int] = None):
         self.protocol_config = protocol_config
+        # Upper bound on mutated message length; padding/duplication otherwise grow it without limit
+        self.max_message_len = max_message_len
         self.mutation_strategies = {
             MutationAction.FIELD_FLIPPING: self._flip_field,
             MutationAction.FIELD_DELETION: self._delete_field,
@@ -29,73 +34,103 @@ class MutationEngine:
             MutationAction.FIELDS_REORDERING: self._reorder_fields,
             MutationAction.SEMANTIC_MUTATION: self._mutate_semantics
         }
+        # Action index -> strategy, in MutationAction order, so the hot path is one tuple index
+        self._strategy_table = tuple(self.mutation_strategies[action] for action in MutationAction)
+        
+        # Use compiled byte loops when numba is installed, NumPy slicing otherwise
+        self._numba = _NUMBA_AVAILABLE
+        if self._numba:
+            warm_up()
     
-    def mutate_protocol_message(self, original_message: bytes, 
-                               mutation_actions: Dict[str, int]) -> bytes:
-        """Mutate protocol message based on agent-selected actions"""
-        mutated_message = bytearray(original_message)
+    def mutate_protocol_message(self, original_message: Union[bytes, np.ndarray], 
+                               mutation_actions: Dict[str, int]) -> Union[bytes, np.ndarray]:
+        """Mutate protocol message based on agent-selected actions
+        
+        Accepts raw bytes or a uint8 NumPy buffer and returns the same type;
+        the socket layer only needs .tobytes() at the send boundary.
+        """
+        # Work on a private contiguous uint8 copy so field operations vectorize
+        mutated_message = np.frombuffer(original_message, dtype=np.uint8).copy()
         
+        fields = self.protocol_config['fields']
+        strategy_table = self._strategy_table
         for field_name, action_idx in mutation_actions.items():
-            if field_name in self.protocol_config['fields']:
-                action = list(MutationAction)[action_idx % len(MutationAction)]
-                strategy = self.mutation_strategies.get(action)
-                
-                if strategy:
-                    mutated_message = strategy(mutated_message, field_name)
+            if field_name in fields:
+                strategy = strategy_table[action_idx % len(strategy_table)]
+                mutated_message = strategy(mutated_message, field_name)
+                if self.max_message_len is not None and len(mutated_message) > self.max_message_len:
+                    mutated_message = mutated_message[:self.max_message_len]
         
-        return bytes(mutated_message)
+        if isinstance(original_message, np.ndarray):
+            return mutated_message
+        return mutated_message.tobytes()
+    
+    @staticmethod
+    def _clamp_span(length: int, start: int, end: int):
+        """Resolve a field position to concrete slice bounds for the compiled kernels"""
+        start = min(start, length)
+        end = length if end is None else max(start, min(end, length))
+        return start, end
     
-    def _flip_field(self, message: bytearray, field_name: str) -> bytearray:
+    # In-place strategies write through a uint8 view and return the buffer they
+    # were given; strategies that change the length return a new ndarray.
+    
+    def _flip_field(self, message: np.ndarray, field_name: str) -> np.ndarray:
         """Flip field values"""
         field_info = self.protocol_config['fields'][field_name]
         start, end = field_info['position']
         
-        # Randomly flip some bits in the field
-        for i in range(start, min(end, len(message))):
-            if random.random() < 0.3:  # 30% probability to flip each byte
-                message[i] ^= 0xFF
+        # Randomly flip some bits in the field (30% probability per byte)
+        buffer = np.frombuffer(message, dtype=np.uint8)
+        if self._numba:
+            start, end = self._clamp_span(len(buffer), start, end)
+            _flip(buffer, start, end, np.random.random(end - start), 0.3)
+        else:
+            field = buffer[start:end]
+            field[np.random.random(field.size) < 0.3] ^= 0xFF
                 
         return message
     
-    def _delete_field(self, message: bytearray, field_name: str) -> bytearray:
+    def _delete_field(self, message: np.ndarray, field_name: str) -> np.ndarray:
         """Delete field"""
         field_info = self.protocol_config['fields'][field_name]
         start, end = field_info['position']
         
         # Fill deleted field with zeros
-        for i in range(start, min(end, len(message))):
-            message[i] = 0x00
+        buffer = np.frombuffer(message, dtype=np.uint8)
+        if self._numba:
+            _del(buffer, *self._clamp_span(len(buffer), start, end))
+        else:
+            buffer[start:end] = 0x00
             
         return message
     
-    def _duplicate_field(self, message: bytearray, field_name: str) -> bytearray:
+    def _duplicate_field(self, message: np.ndarray, field_name: str) -> np.ndarray:
         """Duplicate field"""
         field_info = self.protocol_config['fields'][field_name]
         start, end = field_info['position']
-        field_length = end - start
         
         # Duplicate field at the end of the message
-        field_data = message[start:end]
-        message.extend(field_data)
-        
-        return message
+        buffer = np.frombuffer(message, dtype=np.uint8)
+        if self._numba:
+            return _dup(buffer, *self._clamp_span(len(buffer), start, end))
+        return np.concatenate([buffer, buffer[start:end]])
     
-    def _truncate_message(self, message: bytearray, field_name: str) -> bytearray:
+    def _truncate_message(self, message: np.ndarray, field_name: str) -> np.ndarray:
         """Truncate protocol message"""
         # Randomly truncate to 50%-90% of original length
         new_length = random.randint(len(message) // 2, int(len(message) * 0.9))
         return message[:new_length]
     
-    def _pad_field(self, message: bytearray, field_name: str) -> bytearray:
+    def _pad_field(self, message: np.ndarray, field_name: str) -> np.ndarray:
         """Add padding bytes"""
         # Add random padding bytes
         padding_length = random.randint(1, 100)
-        padding = bytes([random.randint(0, 255) for _ in range(padding_length)])
-        message.extend(padding)
+        padding = np.random.randint(0, 256, size=padding_length, dtype=np.uint8)
         
-        return message
+        return np.concatenate([np.frombuffer(message, dtype=np.uint8), padding])
     
-    def _inject_invalid_flag(self, message: bytearray, field_name: str) -> bytearray:
+    def _inject_invalid_flag(self, message: np.ndarray, field_name: str) -> np.ndarray:
         """Inject invalid flag"""
         field_info = self.protocol_config['fields'][field_name]
         
@@ -103,12 +138,11 @@ class MutationEngine:
             start, end = field_info['position']
             # Set to invalid flag value
             invalid_value = random.choice([0xFF, 0x00, 0x7F])
-            for i in range(start, min(end, len(message))):
-                message[i] = invalid_value
+            np.frombuffer(message, dtype=np.uint8)[start:end] = invalid_value
                 
         return message
     
-    def _reorder_fields(self, message: bytearray, field_name: str) -> bytearray:
+    def _reorder_fields(self, message: np.ndarray, field_name: str) -> np.ndarray:
         """Reorder field sequence"""
         # This is a complex operation that would normally require parsing and rebuilding
         # Here simplified to randomly swapping some byte positions
@@ -118,7 +152,7 @@ class MutationEngine:
             
         return message
     
-    def _mutate_semantics(self, message: bytearray, field_name: str) -> bytearray:
+    def _mutate_semantics(self, message: np.ndarray, field_name: str) -> np.ndarray:
         """Semantic mutation"""
         field_info = self.protocol_config['fields'][field_name]
         start, end = field_info['position']
@@ -132,9 +166,7 @@ class MutationEngine:
             # Write extreme value to field (assuming 4-byte integer)
             if end - start >= 4:
                 packed_value = struct.pack('>I', extreme_value & 0xFFFFFFFF)
-                for i, byte_val in enumerate(packed_value):
-                    if start + i < len(message):
-                        message[start + i] = byte_val
+                field = np.frombuffer(message, dtype=np.uint8)[start:start + 4]
+                field[:] = np.frombuffer(packed_value, dtype=np.uint8)[:field.size]
                         
         return message
-    
\ No newline at end of file
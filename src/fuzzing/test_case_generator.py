@@ -1,5 +1,6 @@
 import random
 import struct
+import numpy as np
 from typing import List, Dict, Any, Optional
 from enum import Enum
 import logging
@@ -15,6 +16,7 @@ class TestCaseGenerator:
     def __init__(self, protocol_configs: Dict[str, Any]):
         self.protocol_configs = protocol_configs
         self.logger = logging.getLogger(__name__)
+        self.rng = np.random.default_rng()
         
         # Seed test case repository
         self.seed_cases = self._initialize_seed_cases()
@@ -189,6 +191,99 @@ class TestCaseGenerator:
         
         return test_cases
     
+    def generate_test_cases_batched(self, protocol: str, count: int,
+                                    priority: TestCasePriority = TestCasePriority.MEDIUM) -> Dict[str, np.ndarray]:
+        """Generate test cases as one padded uint8 batch
+        
+        Each case gets a single weighted mutation applied with vectorized NumPy
+        ops; case i is payload[i, :lengths[i]].
+        """
+        if not self.seed_cases.get(protocol):
+            self.logger.warning(f"Protocol {protocol} has no seed cases")
+            return {
+                'ids': np.arange(0),
+                'payload': np.zeros((0, 0), dtype=np.uint8),
+                'lengths': np.zeros(0, dtype=np.int64),
+                'priority': np.zeros(0, dtype=np.uint8)
+            }
+        
+        seeds = self.seed_cases[protocol]
+        seed_lengths = np.array([len(seed) for seed in seeds], dtype=np.int64)
+        seed_max = int(seed_lengths.max())
+        templates = np.zeros((len(seeds), seed_max), dtype=np.uint8)
+        for row, seed in enumerate(seeds):
+            templates[row, :len(seed)] = np.frombuffer(seed, dtype=np.uint8)
+        
+        # Leave room for the largest growth: 100 padding bytes or a quarter-length duplicate
+        max_len = seed_max + max(100, seed_max // 4)
+        positions = np.arange(max_len)
+        
+        # Random bodies double as padding bytes; chosen seed headers are copied over them
+        seed_idx = self.rng.integers(0, len(seeds), size=count)
+        lengths = seed_lengths[seed_idx]
+        payload = self.rng.integers(0, 256, size=(count, max_len), dtype=np.uint8)
+        in_seed = positions[:seed_max] < lengths[:, None]
+        payload[:, :seed_max][in_seed] = templates[seed_idx][in_seed]
+        
+        # One weighted mutation per case
+        op_names = list(self.mutation_weights.keys())
+        weights = np.array(list(self.mutation_weights.values()))
+        chosen = self.rng.choice(len(op_names), size=count, p=weights / weights.sum())
+        ops = {name: chosen == i for i, name in enumerate(op_names)}
+        
+        # Deletion and duplication are expressed as one gather over source positions
+        span_start = self.rng.integers(0, np.maximum(lengths, 1))
+        span_len = self.rng.integers(1, np.maximum(lengths // 4, 1) + 1)
+        span_len = np.minimum(span_len, np.maximum(lengths - span_start, 1))
+        
+        delete = ops['field_deletion'] & (lengths > 4)
+        duplicate = ops['field_duplication'] & (lengths > 0)
+        source = np.where(delete[:, None] & (positions >= span_start[:, None]),
+                          positions + span_len[:, None], positions)
+        tail = (positions >= lengths[:, None]) & (positions < (lengths + span_len)[:, None])
+        source = np.where(duplicate[:, None] & tail,
+                          span_start[:, None] + positions - lengths[:, None], source)
+        payload = np.take_along_axis(payload, np.minimum(source, max_len - 1), axis=1)
+        lengths = lengths - np.where(delete, span_len, 0) + np.where(duplicate, span_len, 0)
+        
+        # Byte-level mutations on the message head
+        flip = (ops['field_flipping'][:, None] & (positions[:10] < lengths[:, None]) &
+                (self.rng.random((count, 10)) < 0.3))
+        payload[:, :10][flip] ^= 0xFF
+        
+        inject = (ops['invalid_flag_injection'][:, None] & (positions[:5] < lengths[:, None]) &
+                  (self.rng.random((count, 5)) < 0.2))
+        flag_values = np.where(self.rng.random((count, 5)) < 0.5, 0xFF, 0x00).astype(np.uint8)
+        payload[:, :5][inject] = flag_values[inject]
+        
+        semantic = (ops['semantic_mutation'][:, None] & (positions[:3] < lengths[:, None]) &
+                    (self.rng.random((count, 3)) < 0.1))
+        boundary_values = self.rng.choice(np.array([0, 1, 0x7F, 0x80, 0xFF], dtype=np.uint8),
+                                          size=(count, 3))
+        payload[:, :3][semantic] = boundary_values[semantic]
+        
+        # Swap two distinct bytes
+        reorder = np.flatnonzero(ops['fields_reordering'] & (lengths > 2))
+        if reorder.size:
+            reorder_lengths = lengths[reorder]
+            idx1 = self.rng.integers(0, reorder_lengths)
+            idx2 = (idx1 + self.rng.integers(1, reorder_lengths)) % reorder_lengths
+            swapped = payload[reorder, idx1].copy()
+            payload[reorder, idx1] = payload[reorder, idx2]
+            payload[reorder, idx2] = swapped
+        
+        # Length-only mutations: padding exposes the random tail
+        truncate = ops['field_truncation'] & (lengths > 4)
+        lengths = np.where(truncate, self.rng.integers(1, np.maximum(lengths, 2)), lengths)
+        lengths = lengths + np.where(ops['field_padding'], self.rng.integers(1, 101, size=count), 0)
+        
+        return {
+            'ids': np.arange(count),
+            'payload': payload,
+            'lengths': lengths,
+            'priority': np.full(count, priority.value, dtype=np.uint8)
+        }
+    
     def _mutate_with_strategy(self, seed: bytes, protocol: str, strategy: str) -> bytes:
         """Mutate seed using a specific strategy"""
         if strategy == 'boundary_values':
@@ -7,6 +7,7 @@ from pathlib import Path
 
 from src.core.experience_buffer import ExperienceBuffer
 from src.training.reward_calculator import RewardCalculator
+from src.utils.checkpoint_bundle import SAFETENSORS_AVAILABLE, save_protocol_bundle
 
 class OmniFuzzTrainer:
     """OmniFuzz Trainer"""
@@ -116,7 +117,7 @@ class OmniFuzzTrainer:
                 # Get global observations and actions
                 global_obs = agent_array.get_global_observation(observations[protocol])
                 global_next_obs = agent_array.get_global_observation(next_observations[protocol])
-                global_actions = torch.cat([
+                global_actions = torch.stack([
                     actions[protocol][field] for field in actions[protocol]
                 ]) if protocol in actions else torch.tensor([])
                 
@@ -141,7 +142,7 @@ class OmniFuzzTrainer:
             
             if len(buffer) >= self.config['training']['batch_size']:
                 # Sample batch experiences
-                batch = buffer.sample(self.config['training']['batch_size'])
+                batch = buffer.sample(self.config['training']['batch_size'], device=self.device)
                 
                 # Update agent policies
                 agent_array.update_policies(batch, global_reward)
@@ -205,6 +206,10 @@ class OmniFuzzTrainer:
             # Save shared value network
             value_net_path = protocol_save_path / "value_network.pth"
             torch.save(agent_array.shared_value_network.state_dict(), value_net_path)
+            
+            # Single-file bundle for fast mmap loading in run_fuzzing
+            if SAFETENSORS_AVAILABLE:
+                save_protocol_bundle(protocol_save_path, agent_array)
         
         self.logger.info(f"Models saved to: {save_dir}")
     
@@ -220,11 +225,16 @@ class OmniFuzzTrainer:
                 for agent in agent_array.agents:
                     model_path = protocol_load_path / f"agent_{agent.field_name}.pth"
                     if model_path.exists():
-                        agent.policy_network.load_state_dict(torch.load(model_path))
+                        agent.policy_network.load_state_dict(self._load_checkpoint(model_path))
                 
                 # Load shared value network
                 value_net_path = protocol_load_path / "value_network.pth"
                 if value_net_path.exists():
-                    agent_array.shared_value_network.load_state_dict(torch.load(value_net_path))
+                    agent_array.shared_value_network.load_state_dict(self._load_checkpoint(value_net_path))
         
-        self.logger.info(f"Models loaded from {load_dir}")
\ No newline at end of file
+        self.logger.info(f"Models loaded from {load_dir}")
+    
+    def _load_checkpoint(self, path: Path) -> Dict[str, torch.Tensor]:
+        """Read a state_dict straight onto the training device"""
+        # No assign=True on load: optimizers already hold references to the existing parameters
+        return torch.load(path, map_location=self.device, weights_only=True, mmap=True)
\ No newline at end of file
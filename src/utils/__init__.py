@@ -1,16 +1,21 @@
 """
 Utilities module - data processing and monitoring tools
 
-Includes data preprocessor, protocol utilities, monitoring utilities
+Includes data preprocessor, protocol utilities, monitoring utilities, config loader, checkpoint bundles
 """
 
 from .data_preprocessor import DataPreprocessor
 from .protocol_utils import ProtocolUtils
 from .monitoring import ResourceMonitor, PerformanceProfiler
+from .config_loader import load_config
+from .checkpoint_bundle import save_protocol_bundle, load_bundle
 
 __all__ = [
     'DataPreprocessor',
     'ProtocolUtils',
     'ResourceMonitor',
-    'PerformanceProfiler'
+    'PerformanceProfiler',
+    'load_config',
+    'save_protocol_bundle',
+    'load_bundle'
 ]
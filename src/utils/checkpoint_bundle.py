@@ -0,0 +1,40 @@
+import torch
+from pathlib import Path
+from typing import Dict
+
+try:
+    from safetensors.torch import load_file, save_file
+    SAFETENSORS_AVAILABLE = True
+except ImportError:
+    SAFETENSORS_AVAILABLE = False
+
+# One file per protocol: 'value.{param}' for the shared value network, 'policy.{field}.{param}' per agent
+BUNDLE_NAME = "bundle.safetensors"
+
+def write_bundle(path: Path, value_state: Dict[str, torch.Tensor],
+                 policy_states: Dict[str, Dict[str, torch.Tensor]]):
+    """Write value and per-field policy state_dicts into one safetensors file"""
+    tensors = {f"value.{name}": tensor for name, tensor in value_state.items()}
+    for field_name, state_dict in policy_states.items():
+        tensors.update({f"policy.{field_name}.{name}": tensor for name, tensor in state_dict.items()})
+    
+    # safetensors needs contiguous CPU tensors that do not share storage
+    save_file({key: tensor.detach().cpu().contiguous() for key, tensor in tensors.items()}, str(path))
+
+def save_protocol_bundle(protocol_path: Path, agent_array) -> Path:
+    """Save an AgentArray's policy and value weights as the protocol's bundle"""
+    bundle_path = Path(protocol_path) / BUNDLE_NAME
+    write_bundle(
+        bundle_path,
+        agent_array.shared_value_network.state_dict(),
+        {agent.field_name: agent.policy_network.state_dict() for agent in agent_array.agents}
+    )
+    return bundle_path
+
+def load_bundle(path: Path, device: torch.device) -> Dict[str, torch.Tensor]:
+    """Memory-map a bundle and place its tensors on device"""
+    return load_file(str(path), device=str(device))
+
+def bundle_state_dict(weights: Dict[str, torch.Tensor], prefix: str) -> Dict[str, torch.Tensor]:
+    """Pick one module's state_dict out of a loaded bundle by key prefix, e.g. 'policy.function_code.'"""
+    return {key[len(prefix):]: tensor for key, tensor in weights.items() if key.startswith(prefix)}
@@ -0,0 +1,22 @@
+import os
+import yaml
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Any
+
+# Prefer the libyaml C parser, fall back to the pure-Python loader
+_SafeLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+@lru_cache(maxsize=None)
+def _load_config_cached(resolved_path: str, mtime_ns: int) -> Dict[str, Any]:
+    """Parse a YAML config file once per resolved path and modification time"""
+    with open(resolved_path, 'rb') as f:
+        return yaml.load(f, Loader=_SafeLoader)
+
+def load_config(path: str) -> Dict[str, Any]:
+    """Load a YAML config file, memoized by resolved path and mtime
+    
+    The returned dict is shared between callers and must not be mutated.
+    """
+    resolved_path = str(Path(path).resolve())
+    return _load_config_cached(resolved_path, os.stat(resolved_path).st_mtime_ns)
@@ -1,19 +1,23 @@
 import time
 import psutil
 import logging
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 import threading
+from collections import deque
 from datetime import datetime
 
 class ResourceMonitor:
     """Resource monitor"""
 
-    def __init__(self, interval: float = 1.0):
+    def __init__(self, interval: float = 1.0, max_samples: Optional[int] = None):
         self.interval = interval
         self.logger = logging.getLogger(__name__)
         self.monitoring = False
         self.monitor_thread = None
-        self.metrics_history = []
+        # Ring of recent samples; appended only by the monitor thread
+        self.metrics_history = deque(maxlen=max_samples)
+        self.sample_count = 0
+        self._stop_event = threading.Event()
 
     def start_monitoring(self):
         """Start monitoring"""
@@ -22,6 +26,7 @@ class ResourceMonitor:
             return
 
         self.monitoring = True
+        self._stop_event.clear()
         self.monitor_thread = threading.Thread(target=self._monitor_loop)
         self.monitor_thread.daemon = True
         self.monitor_thread.start()
@@ -30,25 +35,32 @@ class ResourceMonitor:
     def stop_monitoring(self):
         """Stop monitoring"""
         self.monitoring = False
+        self._stop_event.set()
         if self.monitor_thread:
             self.monitor_thread.join(timeout=5.0)
         self.logger.info("Resource monitoring stopped")
 
     def _monitor_loop(self):
         """Monitoring loop"""
+        # Sample on a fixed monotonic schedule; the event wakes the thread at once on stop
+        next_sample = time.monotonic()
         while self.monitoring:
-            metrics = self._collect_metrics()
-            self.metrics_history.append(metrics)
-            time.sleep(self.interval)
+            self.metrics_history.append(self._collect_metrics())
+            self.sample_count += 1
+            next_sample += self.interval
+            if self._stop_event.wait(max(0.0, next_sample - time.monotonic())):
+                break
 
     def _collect_metrics(self) -> Dict[str, Any]:
         """Collect system metrics"""
+        disk_io = psutil.disk_io_counters()
+        network_io = psutil.net_io_counters()
         return {
             'timestamp': datetime.now().isoformat(),
             'cpu_percent': psutil.cpu_percent(interval=None),
             'memory_percent': psutil.virtual_memory().percent,
-            'disk_io': psutil.disk_io_counters()._asdict() if psutil.disk_io_counters() else {},
-            'network_io': psutil.net_io_counters()._asdict() if psutil.net_io_counters() else {},
+            'disk_io': disk_io._asdict() if disk_io else {},
+            'network_io': network_io._asdict() if network_io else {},
             'process_count': len(psutil.pids())
         }
 
@@ -67,12 +79,12 @@ class ResourceMonitor:
         memory_values = [m['memory_percent'] for m in self.metrics_history]
 
         return {
-            'duration_seconds': len(self.metrics_history) * self.interval,
+            'duration_seconds': self.sample_count * self.interval,
             'cpu_avg': sum(cpu_values) / len(cpu_values),
             'cpu_max': max(cpu_values),
             'memory_avg': sum(memory_values) / len(memory_values),
             'memory_max': max(memory_values),
-            'total_metrics': len(self.metrics_history)
+            'total_metrics': self.sample_count
         }
 
     def generate_report(self) -> str:
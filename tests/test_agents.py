@@ -9,6 +9,7 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
 from core.agent_array import AgentArray
 from core.policy_network import PolicyNetwork
 from core.value_network import ValueNetwork
+from core.experience_buffer import ExperienceBuffer, PrioritizedExperienceBuffer
 
 class TestAgentArray(unittest.TestCase):
 
@@ -55,6 +56,92 @@ class TestAgentArray(unittest.TestCase):
         self.assertIsInstance(actions['function_code'], torch.Tensor)
         self.assertIsInstance(actions['data'], torch.Tensor)
 
+    def test_batched_action_selection(self):
+        """Test batched action selection"""
+        field_config = {
+            'function_code': {'state_dim': 10, 'action_dim': 5, 'mutation_actions': ['flip']},
+            'unit_id': {'state_dim': 10, 'action_dim': 5, 'mutation_actions': ['flip']},
+            'data': {'state_dim': 20, 'action_dim': 8, 'mutation_actions': ['flip']}
+        }
+        agent_array = AgentArray(
+            protocol_name=self.protocol_name,
+            field_config=field_config,
+            shared_value_network=self.shared_value_network,
+            device=self.device
+        )
+        observations = {
+            'function_code': torch.randn(10),
+            'unit_id': torch.randn(10),
+            'data': torch.randn(20)
+        }
+        
+        actions = agent_array.select_actions_batched(observations)
+        
+        self.assertEqual(list(actions.keys()), agent_array.field_order)
+        self.assertTrue(0 <= actions['function_code'].item() < 5)
+        self.assertTrue(0 <= actions['unit_id'].item() < 5)
+        self.assertTrue(0 <= actions['data'].item() < 8)
+        
+        action_tensor = agent_array.select_actions_tensor(observations)
+        self.assertEqual(action_tensor.shape, (len(agent_array.field_order),))
+        
+        # 批量前向应与逐个前向的概率一致
+        for agent in agent_array.agents:
+            agent.policy_network.eval()
+        group = agent_array._agent_groups[(10, 5)]
+        stacked = torch.stack([observations[agent.field_name] for agent in group])
+        batched_probs = agent_array._batched_policy_forward(group, stacked)
+        for i, agent in enumerate(group):
+            expected = agent.policy_network(observations[agent.field_name])
+            self.assertTrue(torch.allclose(batched_probs[i], expected, atol=1e-6))
+
+    def test_cross_protocol_action_selection(self):
+        """Test batched action selection across protocol agent arrays"""
+        other_array = AgentArray(
+            protocol_name='ethernet_ip',
+            field_config={'command': {'state_dim': 10, 'action_dim': 5, 'mutation_actions': ['flip']}},
+            shared_value_network=self.shared_value_network,
+            device=self.device
+        )
+        observations = {
+            'modbus_tcp': {'function_code': torch.randn(10), 'data': torch.randn(20)},
+            'ethernet_ip': {'command': torch.randn(10)}
+        }
+        
+        actions = AgentArray.select_actions_across(
+            {'modbus_tcp': self.agent_array, 'ethernet_ip': other_array}, observations
+        )
+        
+        # function_code 与 command 形状相同，应在同一批次中前向
+        self.assertEqual(actions['modbus_tcp'].shape, (2,))
+        self.assertEqual(actions['ethernet_ip'].shape, (1,))
+        self.assertTrue(0 <= actions['ethernet_ip'][0].item() < 5)
+
+    def test_stacked_policy_forward(self):
+        """Test vmapped forward over stacked policy weights"""
+        other_array = AgentArray(
+            protocol_name='ethernet_ip',
+            field_config={'command': {'state_dim': 10, 'action_dim': 5, 'mutation_actions': ['flip']}},
+            shared_value_network=self.shared_value_network,
+            device=self.device
+        )
+        arrays = {'modbus_tcp': self.agent_array, 'ethernet_ip': other_array}
+        for array in arrays.values():
+            for agent in array.agents:
+                agent.policy_network.eval()
+        
+        members = AgentArray._pool_groups(arrays)[(10, 5)]
+        group = [agent for _, agent in members]
+        obs = torch.randn(len(group), 10)
+        expected = AgentArray._batched_policy_forward(group, obs)
+        
+        for array in arrays.values():
+            array.stack_policy_weights()
+        stacked = AgentArray._pooled_stack(arrays, (10, 5))
+        
+        # 跨协议拼接后的堆叠权重应与逐层 bmm 结果一致
+        self.assertTrue(torch.allclose(AgentArray._batched_policy_forward(group, obs, stacked), expected, atol=1e-6))
+
     def test_global_observation(self):
         """Test global observation"""
         individual_observations = {
@@ -67,6 +154,39 @@ class TestAgentArray(unittest.TestCase):
         self.assertIsInstance(global_obs, torch.Tensor)
         self.assertEqual(global_obs.shape[0], 30)  # 10 + 20
 
+class TestExperienceBuffer(unittest.TestCase):
+
+    def test_ring_buffer_sampling(self):
+        """Test column-wise storage, wrap-around and batched sampling"""
+        buffer = ExperienceBuffer(capacity=4)
+        for step in range(6):
+            buffer.add({
+                'observations': {'function_code': torch.full((10,), float(step))},
+                'actions': {'function_code': torch.tensor(step)},
+                'reward': float(step),
+                'done': False
+            })
+        
+        # 容量为 4，前两条经验应已被覆盖
+        self.assertEqual(len(buffer), 4)
+        batch = buffer.sample(4)
+        self.assertEqual(batch['observations']['function_code'].shape, (4, 10))
+        self.assertEqual(sorted(batch['reward'].tolist()), [2.0, 3.0, 4.0, 5.0])
+        self.assertEqual(buffer.sample(2)['actions']['function_code'].shape, (2,))
+
+    def test_prioritized_sampling(self):
+        """Test that sum-tree sampling follows updated priorities"""
+        buffer = PrioritizedExperienceBuffer(capacity=5)
+        for step in range(5):
+            buffer.add({'reward': float(step)})
+        
+        # 只有第 3 条经验保留优先级，采样应全部落在该条上
+        buffer.update_priorities([0, 1, 2, 3, 4], [0.0, 0.0, 0.0, 1.0, 0.0])
+        batch, indices, weights = buffer.sample(4)
+        self.assertTrue(torch.all(batch['reward'] == 3.0))
+        self.assertEqual(indices.tolist(), [3, 3, 3, 3])
+        self.assertEqual(weights.shape, (4,))
+
 class TestPolicyNetwork(unittest.TestCase):
 
     def setUp(self):
@@ -1,12 +1,15 @@
 import unittest
 import sys
 import os
+import numpy as np
 
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
 from fuzzing.mutation_engine import MutationEngine, MutationAction
 from fuzzing.test_case_generator import TestCaseGenerator, TestCasePriority
 from fuzzing.coverage_tracker import CoverageTracker, LLVMCoverageTracker
+from scripts.run_fuzzing import record_vulnerabilities
 
 class TestMutationEngine(unittest.TestCase):
 
@@ -52,6 +55,18 @@ class TestMutationEngine(unittest.TestCase):
         deleted = self.mutation_engine._delete_field(bytearray(test_message), 'data')
         self.assertEqual(deleted[1:], b'\x00\x00')  # deleted field should be zeroed
 
+    def test_seeded_flip_reproducible(self):
+        """Test that np.random.seed reproduces flips on both the compiled and NumPy paths"""
+        # Leave the global RNG as later tests expect it
+        self.addCleanup(np.random.set_state, np.random.get_state())
+        flipped = []
+        for use_numba in (self.mutation_engine._numba, False):
+            self.mutation_engine._numba = use_numba
+            np.random.seed(7)
+            flipped.append(bytes(self.mutation_engine._flip_field(bytearray(b'\x01\x02\x03'), 'data')))
+        
+        self.assertEqual(flipped[0], flipped[1])
+
 class TestTestCaseGenerator(unittest.TestCase):
 
     def setUp(self):
@@ -81,6 +96,21 @@ class TestTestCaseGenerator(unittest.TestCase):
             self.assertEqual(test_case['protocol'], 'modbus_tcp')
             self.assertEqual(test_case['priority'], TestCasePriority.HIGH)
 
+    def test_batched_test_case_generation(self):
+        """Test batched test-case generation"""
+        batch = self.test_generator.generate_test_cases_batched(
+            protocol='modbus_tcp',
+            count=64,
+            priority=TestCasePriority.HIGH
+        )
+        
+        self.assertEqual(batch['payload'].shape[0], 64)
+        self.assertEqual(batch['payload'].dtype, np.uint8)
+        self.assertEqual(len(batch['lengths']), 64)
+        self.assertTrue((batch['lengths'] >= 1).all())
+        self.assertTrue((batch['lengths'] <= batch['payload'].shape[1]).all())
+        self.assertTrue((batch['priority'] == TestCasePriority.HIGH.value).all())
+
     def test_seed_statistics(self):
         """Test seed statistics"""
         stats = self.test_generator.get_seed_statistics()
@@ -107,6 +137,43 @@ class TestCoverageTracker(unittest.TestCase):
         self.assertIn('new_functions', coverage_data)
         self.assertIn('path_depth', coverage_data)
 
+    def test_new_coverage_counts(self):
+        """Test that only first-seen blocks and functions are counted as new"""
+        first = self.coverage_tracker.record_execution(['bb1', 'bb2', 'bb2'], ['func1'], ['bb1'])
+        second = self.coverage_tracker.record_execution(['bb2', 'bb3'], ['func1', 'func2'], ['bb2'])
+        
+        self.assertEqual(first['new_blocks'], 2)
+        self.assertEqual(second['new_blocks'], 1)
+        self.assertEqual(second['new_functions'], 1)
+        self.assertEqual(second['unique_basic_blocks'], 3)
+
+    def test_edge_coverage(self):
+        """Test that edge hits only count as new when they reach a new hit-count bucket"""
+        sequence = ['bb1', 'bb2', 'bb3']
+        first = self.coverage_tracker.record_execution(sequence, [], sequence)
+        repeat = self.coverage_tracker.record_execution(sequence, [], sequence)
+        looped = self.coverage_tracker.record_execution(sequence, [], sequence + ['bb1', 'bb2'])
+        
+        self.assertEqual(first['new_edge_bits'], 2)
+        self.assertEqual(repeat['new_edge_bits'], 0)
+        self.assertGreater(looped['new_edge_bits'], 0)
+
+    def test_batch_recording(self):
+        """Test that a batched episode covers the same blocks, edges and paths as single records"""
+        executions = [
+            {'basic_blocks': ['bb1', 'bb2'], 'functions': ['func1'], 'execution_sequence': ['bb1', 'bb2']},
+            {'basic_blocks': ['bb2', 'bb3'], 'functions': ['func2'], 'execution_sequence': ['bb2', 'bb3']}
+        ]
+        batch = self.coverage_tracker.record_execution_batch(executions)
+        
+        single = CoverageTracker()
+        edge_bits = sum(single.record_execution(**execution)['new_edge_bits'] for execution in executions)
+        
+        self.assertEqual(batch['unique_basic_blocks'], single.covered_basic_blocks)
+        self.assertEqual(batch['unique_functions'], single.covered_functions)
+        self.assertEqual(batch['new_paths'], len(single.execution_paths))
+        self.assertEqual(batch['new_edge_bits'], edge_bits)
+
     def test_coverage_summary(self):
         """Test coverage summary"""
         # Set totals
@@ -123,5 +190,17 @@ class TestCoverageTracker(unittest.TestCase):
         self.assertIn('function_coverage', summary)
         self.assertIn('path_coverage', summary)
 
+class TestVulnerabilityDedup(unittest.TestCase):
+
+    def test_distinct_without_stack_trace(self):
+        """Test that vulnerabilities without stack traces are not merged into one"""
+        timeout = {'type': 'denial_of_service', 'severity': 'major', 'request_sample': '0102'}
+        error = {'type': 'protocol_error', 'severity': 'minor', 'request_sample': '0304'}
+        found = {}
+        record_vulnerabilities(found, [timeout, error, dict(timeout)])
+        
+        self.assertEqual(len(found), 2)
+        self.assertEqual(sorted(entry['count'] for entry in found.values()), [1, 2])
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -56,6 +56,14 @@ class TestPolicyNetworkMLP(unittest.TestCase):
         self.assertEqual(output.shape, (batch_size, 8))
         self.assertTrue(torch.allclose(output.sum(dim=1), torch.ones(batch_size), atol=1e-6))
 
+    def test_scripted_forward(self):
+        """Test that the TorchScript build matches eager execution"""
+        scripted = PolicyNetworkMLP.scripted(input_dim=self.input_dim)
+        scripted.load_state_dict(self.policy_net.state_dict())
+        input_tensor = torch.randn(4, self.input_dim)
+        
+        self.assertTrue(torch.allclose(scripted(input_tensor), self.policy_net(input_tensor), atol=1e-6))
+
 class TestValueNetwork(unittest.TestCase):
 
     def setUp(self):